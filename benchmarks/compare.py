@@ -0,0 +1,118 @@
+"""
+Сравнение отчетов нагрузочного теста двух коммитов.
+
+Печатает для каждого сценария пропускную способность и задержки
+p50/p95/p99 базового и нового отчета с изменением в процентах.
+С --fail-above завершается с кодом 1, если p95 какого-либо сценария
+вырос или пропускная способность упала больше чем на заданный процент.
+
+Запуск:
+    python benchmarks/compare.py benchmarks/results/load-1a2b3c4.json benchmarks/results/load-5d6e7f8.json
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Optional
+
+# (метрика, путь в отчете сценария, рост — это улучшение)
+METRICS = (
+    ("запросов/с", ("throughput_rps",), True),
+    ("p50, мс", ("latency_ms", "p50"), False),
+    ("p95, мс", ("latency_ms", "p95"), False),
+    ("p99, мс", ("latency_ms", "p99"), False),
+)
+
+
+def load_report(path: Path) -> dict:
+    return json.loads(path.read_text())
+
+
+def metric_value(scenario: dict, path: tuple[str, ...]) -> Optional[float]:
+    value = scenario
+    for key in path:
+        value = (value or {}).get(key)
+    return value
+
+
+def change_percent(base: Optional[float], new: Optional[float]) -> Optional[float]:
+    if base is None or new is None or base == 0:
+        return None
+    return (new - base) / base * 100
+
+
+def describe(report: dict) -> str:
+    meta = report.get("meta", {})
+    commit = meta.get("commit") or "?"
+    if meta.get("dirty"):
+        commit += "+изменения"
+    return " ".join(filter(None, [commit, meta.get("label"), meta.get("created_at")]))
+
+
+def compare(base: dict, new: dict, fail_above: Optional[float] = None) -> tuple[list[str], list[str]]:
+    """
+    Сравнить отчеты.
+
+    Returns:
+        Строки таблицы и список регрессий (пустой, если fail_above не задан)
+    """
+    lines = [
+        f"база:  {describe(base)}",
+        f"новый: {describe(new)}",
+    ]
+    if base.get("meta", {}).get("params") != new.get("meta", {}).get("params"):
+        lines.append("внимание: параметры замеров различаются, сравнение может быть некорректным")
+    lines.append("")
+    lines.append(f"{'сценарий':<20} {'метрика':<11} {'база':>10} {'новый':>10} {'изменение':>10}")
+
+    regressions = []
+    base_scenarios = base.get("scenarios", {})
+    new_scenarios = new.get("scenarios", {})
+    for name in [*base_scenarios, *(key for key in new_scenarios if key not in base_scenarios)]:
+        if name not in base_scenarios or name not in new_scenarios:
+            lines.append(f"{name:<20} есть только в {'базовом' if name in base_scenarios else 'новом'} отчете")
+            continue
+        for title, path, higher_is_better in METRICS:
+            base_value = metric_value(base_scenarios[name], path)
+            new_value = metric_value(new_scenarios[name], path)
+            change = change_percent(base_value, new_value)
+            lines.append(
+                f"{name:<20} {title:<11} {_format(base_value):>10} {_format(new_value):>10} "
+                f"{'' if change is None else f'{change:+.1f}%':>10}"
+            )
+            if fail_above is None or change is None or path[-1] not in ("throughput_rps", "p95"):
+                continue
+            worse = -change if higher_is_better else change
+            if worse > fail_above:
+                regressions.append(f"{name}: {title} {_format(base_value)} -> {_format(new_value)} ({change:+.1f}%)")
+        errors = metric_value(new_scenarios[name], ("errors",))
+        if errors:
+            lines.append(f"{name:<20} ошибок в новом отчете: {errors}")
+    return lines, regressions
+
+
+def _format(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.2f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base", type=Path, help="отчет базового коммита")
+    parser.add_argument("new", type=Path, help="отчет нового коммита")
+    parser.add_argument(
+        "--fail-above", type=float, default=None,
+        help="допустимое ухудшение p95 и пропускной способности, проценты",
+    )
+    args = parser.parse_args()
+
+    lines, regressions = compare(load_report(args.base), load_report(args.new), args.fail_above)
+    print("\n".join(lines))
+    if regressions:
+        print(f"\nРегрессии больше {args.fail_above:g}%:")
+        print("\n".join(f"  {line}" for line in regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Нагрузочный тест движка БД приложения.
+
+Запускает --concurrency корутин, которые в течение --duration секунд
+выполняют запрос первой страницы GET /packages/ через AsyncSession,
+и печатает пропускную способность и задержки для двух конфигураций:
+
+    прежняя  — echo=True, размеры пула по умолчанию SQLAlchemy, без pre_ping
+    текущая  — параметры DB_* из src/config/settings.py
+
+Логирование настраивается так же, как в приложении (stdout + logs/dostavka.log),
+поэтому при echo=True в замер входит форматирование и запись каждого запроса.
+Результаты печатаются в stderr, чтобы их не перемешивало с выводом echo.
+
+Запуск (нужна БД с примененными миграциями):
+    python benchmarks/db_pool_load.py --concurrency 50 --duration 20 > /dev/null
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from src.config.settings import (
+    DB_ECHO,
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_SIZE,
+    DB_STATEMENT_CACHE_SIZE,
+    REAL_DATABASE_URL,
+)
+from src.db.session import create_db_engine
+from src.models.db import Package, Session
+from src.utils.logging import setup_logging
+
+CONFIGURATIONS = {
+    "прежняя": {
+        "echo": True, "pool_size": 5, "max_overflow": 10,
+        "pool_pre_ping": False, "statement_cache_size": 100,
+    },
+    "текущая": {
+        "echo": DB_ECHO, "pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW,
+        "pool_pre_ping": DB_POOL_PRE_PING, "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+    },
+}
+
+
+def log(message: str):
+    print(message, file=sys.stderr, flush=True)
+
+
+async def load_session_ids(session_factory: sessionmaker, limit: int = 1000) -> list[uuid.UUID]:
+    """ID существующих сессий; если их нет — случайные (пустые выборки)."""
+    async with session_factory() as session:
+        result = await session.execute(select(Session.id).limit(limit))
+        session_ids = list(result.scalars().all())
+    return session_ids or [uuid.uuid4() for _ in range(limit)]
+
+
+async def worker(session_factory: sessionmaker, session_ids: list[uuid.UUID], deadline: float, timings: list[float]):
+    """Выполнять запрос страницы посылок до deadline."""
+    while time.perf_counter() < deadline:
+        session_id = random.choice(session_ids)
+        started = time.perf_counter()
+        async with session_factory() as session:
+            result = await session.execute(
+                select(Package)
+                .where(Package.session_id == session_id)
+                .order_by(Package.created_at.desc(), Package.id.desc())
+                .limit(20)
+            )
+            result.scalars().all()
+        timings.append((time.perf_counter() - started) * 1000)
+
+
+async def run_configuration(title: str, options: dict, url: str, concurrency: int, duration: float):
+    engine = create_db_engine(url, **options)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        session_ids = await load_session_ids(session_factory)
+
+        # Прогрев: соединения пула и кеши подготовленных выражений
+        warmup_deadline = time.perf_counter() + min(2.0, duration / 5)
+        await asyncio.gather(*(worker(session_factory, session_ids, warmup_deadline, []) for _ in range(concurrency)))
+
+        timings: list[float] = []
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(worker(session_factory, session_ids, deadline, timings) for _ in range(concurrency)))
+    finally:
+        await engine.dispose()
+
+    timings.sort()
+    quantiles = statistics.quantiles(timings, n=100)
+    log(
+        f"{title:<8} {options}\n"
+        f"         {len(timings) / duration:8.0f} запросов/с   "
+        f"p50 {quantiles[49]:6.2f} мс   p95 {quantiles[94]:6.2f} мс   p99 {quantiles[98]:6.2f} мс"
+    )
+
+
+async def run(url: str, concurrency: int, duration: float):
+    for title, options in CONFIGURATIONS.items():
+        await run_configuration(title, options, url, concurrency, duration)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=REAL_DATABASE_URL)
+    parser.add_argument("--concurrency", type=int, default=50, help="одновременных запросов")
+    parser.add_argument("--duration", type=float, default=20.0, help="длительность замера, секунды")
+    args = parser.parse_args()
+
+    setup_logging()
+    asyncio.run(run(args.database_url, args.concurrency, args.duration))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Планы запросов выборки посылок на синтетических данных.
+
+Создает одну "тяжелую" сессию с большим числом посылок и фоновые сессии,
+затем выполняет EXPLAIN (ANALYZE, BUFFERS) для запросов, которые строит
+PackageRepository.get_by_session_id, и печатает планы и время выполнения.
+Запросы выполняются подготовленными, с параметрами и generic-планом, как
+их в итоге выполняет asyncpg.
+
+Запуск (нужна БД с примененными миграциями):
+    python benchmarks/explain_packages.py --packages 200000 --cleanup
+"""
+
+import argparse
+import sys
+import uuid
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine, func, select, text, tuple_
+from sqlalchemy.dialects import postgresql
+
+from src.config.settings import CELERY_DATABASE_URL
+from src.models.db import PENDING_SHIPPING_CONDITION, Package
+
+
+def seed(conn, session_ids: list[uuid.UUID], packages: int, background_packages: int) -> list[int]:
+    """
+    Заполнить таблицы синтетическими данными.
+
+    Первая сессия из session_ids получает packages посылок, остальные
+    делят между собой background_packages.
+    """
+    type_ids = [row[0] for row in conn.execute(text("SELECT id FROM package_types ORDER BY id"))]
+    if not type_ids:
+        raise SystemExit("Таблица package_types пуста: запустите приложение или init_package_types()")
+
+    conn.execute(text(
+        "INSERT INTO sessions (id, created_at, last_activity) "
+        "SELECT unnest(CAST(:ids AS uuid[])), now(), now()"
+    ), {"ids": [str(session_id) for session_id in session_ids]})
+
+    insert_packages = text(
+        "INSERT INTO packages (id, name, weight, price, shipping_cost, shipping_status, created_at, type_id, session_id) "
+        "SELECT gen_random_uuid(), 'bench-' || g, 0.1 + random() * 10, random() * 100000, "
+        "       CASE WHEN g % 20 = 0 THEN NULL ELSE round(CAST(random() * 10000 AS numeric), 2) END, "
+        "       CAST(CASE WHEN g % 20 = 0 THEN 'pending' ELSE 'calculated' END AS shipping_status), "
+        "       (now() at time zone 'utc') - g * interval '1 second', "
+        "       (CAST(:type_ids AS int[]))[1 + (g % :types)], "
+        "       (CAST(:session_ids AS uuid[]))[1 + (g % :sessions)] "
+        "FROM generate_series(1, :n) AS g"
+    )
+    common = {"type_ids": type_ids, "types": len(type_ids)}
+    conn.execute(insert_packages, {
+        **common, "n": packages, "session_ids": [str(session_ids[0])], "sessions": 1,
+    })
+    conn.execute(insert_packages, {
+        **common, "n": background_packages,
+        "session_ids": [str(session_id) for session_id in session_ids[1:]],
+        "sessions": len(session_ids) - 1,
+    })
+    conn.execute(text("ANALYZE packages"))
+    conn.execute(text("ANALYZE sessions"))
+    return type_ids
+
+
+def listing_queries(session_id: uuid.UUID, type_id: int, size: int, deep_page: int, after: tuple):
+    """Запросы, которые строит PackageRepository.get_by_session_id."""
+    base = select(Package).where(Package.session_id == session_id)
+    order = (Package.created_at.desc(), Package.id.desc())
+    total = func.count().over().label("total")
+
+    return {
+        "первая страница": base.order_by(*order).limit(size).add_columns(total),
+        "первая страница без total": base.order_by(*order).limit(size),
+        f"страница {deep_page} (OFFSET)": base.order_by(*order).offset((deep_page - 1) * size).limit(size),
+        f"страница {deep_page} (cursor)": base.where(tuple_(Package.created_at, Package.id) < tuple_(*after))
+            .order_by(*order).limit(size),
+        "фильтр по типу": base.where(Package.type_id == type_id).order_by(*order).limit(size),
+        "без рассчитанной стоимости": base.where(text(PENDING_SHIPPING_CONDITION)).order_by(*order).limit(size),
+        "COUNT(*)": select(func.count()).select_from(base.subquery()),
+    }
+
+
+def deep_page_cursor(conn, session_id: uuid.UUID, size: int, deep_page: int) -> tuple:
+    """Ключ сортировки последней посылки страницы перед deep_page."""
+    row = conn.execute(
+        select(Package.created_at, Package.id)
+        .where(Package.session_id == session_id)
+        .order_by(Package.created_at.desc(), Package.id.desc())
+        .offset((deep_page - 1) * size - 1)
+        .limit(1)
+    ).one()
+    return row.created_at, row.id
+
+
+def explain(conn, title: str, query):
+    """
+    Выполнить EXPLAIN ANALYZE подготовленного запроса и напечатать план.
+
+    Запрос компилируется с параметрами $n, как его отправляет asyncpg, и
+    планируется generic-планом: такой план PostgreSQL выбирает для
+    подготовленного запроса после нескольких выполнений.
+    """
+    compiled = query.compile(dialect=postgresql.dialect(paramstyle="numeric_dollar"))
+    params = {
+        f"p{position}": str(value) if isinstance(value, uuid.UUID) else value
+        for position, value in enumerate(compiled.params[name] for name in compiled.positiontup)
+    }
+    arguments = f"({', '.join(f':{name}' for name in params)})" if params else ""
+
+    conn.exec_driver_sql("SET plan_cache_mode = force_generic_plan")
+    conn.exec_driver_sql(f"PREPARE listing AS {compiled.string}")
+    try:
+        plan = [row[0] for row in conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) EXECUTE listing{arguments}"), params)]
+    finally:
+        conn.exec_driver_sql("DEALLOCATE listing")
+    print(f"\n=== {title}")
+    print("\n".join(plan))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=CELERY_DATABASE_URL)
+    parser.add_argument("--packages", type=int, default=100_000, help="посылок в тяжелой сессии")
+    parser.add_argument("--background-sessions", type=int, default=1_000)
+    parser.add_argument("--background-packages", type=int, default=200_000)
+    parser.add_argument("--size", type=int, default=20, help="размер страницы")
+    parser.add_argument("--deep-page", type=int, default=2_000, help="номер глубокой страницы")
+    parser.add_argument("--cleanup", action="store_true", help="удалить синтетические данные после замеров")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    session_ids = [uuid.uuid4() for _ in range(args.background_sessions + 1)]
+    session_id = session_ids[0]
+
+    with engine.begin() as conn:
+        print(f"Создание данных: {args.packages} посылок в сессии {session_id}, "
+              f"{args.background_packages} в {args.background_sessions} фоновых сессиях...")
+        type_ids = seed(conn, session_ids, args.packages, args.background_packages)
+
+    try:
+        with engine.connect() as conn:
+            after = deep_page_cursor(conn, session_id, args.size, args.deep_page)
+            queries = listing_queries(session_id, type_ids[0], args.size, args.deep_page, after)
+            for title, query in queries.items():
+                explain(conn, title, query)
+    finally:
+        if args.cleanup:
+            ids = [str(session_id) for session_id in session_ids]
+            with engine.begin() as conn:
+                conn.execute(text("DELETE FROM packages WHERE session_id = ANY(CAST(:ids AS uuid[]))"), {"ids": ids})
+                conn.execute(text("DELETE FROM sessions WHERE id = ANY(CAST(:ids AS uuid[]))"), {"ids": ids})
+            print("\nСинтетические данные удалены")
+
+
+if __name__ == "__main__":
+    main()
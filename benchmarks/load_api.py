@@ -0,0 +1,371 @@
+"""
+Нагрузочный тест HTTP API.
+
+Готовит данные (сессию с --seed посылками через POST /packages/bulk),
+затем по очереди нагружает сценарии из --concurrency корутин в течение
+--duration секунд каждый и сохраняет отчет в JSON: пропускная способность,
+задержки p50/p95/p99 и средние замеры из заголовка Server-Timing.
+
+Сценарии:
+    types              GET /packages/types
+    types_not_modified GET /packages/types с If-None-Match (ответ 304)
+    get                GET /packages/{id} случайной посылки сессии
+    list               GET /packages/ — первая страница
+    list_filtered      GET /packages/ с фильтрами type_id и has_shipping_cost
+    list_deep_offset   GET /packages/?page=--deep-page
+    list_deep_cursor   та же страница через cursor
+    create             POST /packages/ (у каждой корутины своя сессия)
+
+Отчеты двух коммитов сравнивает benchmarks/compare.py.
+
+Запуск (нужно запущенное приложение, например make docker-up):
+    python benchmarks/load_api.py --base-url http://localhost:8000 --duration 20
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Optional
+
+import httpx
+
+project_root = Path(__file__).parent.parent
+
+SCENARIOS = (
+    "types",
+    "types_not_modified",
+    "get",
+    "list",
+    "list_filtered",
+    "list_deep_offset",
+    "list_deep_cursor",
+    "create",
+)
+
+
+def log(message: str):
+    print(message, file=sys.stderr, flush=True)
+
+
+def percentile(values: list[float], q: float) -> Optional[float]:
+    """Перцентиль отсортированного списка (метод ближайшего ранга)."""
+    if not values:
+        return None
+    index = min(len(values), max(1, math.ceil(q / 100 * len(values)))) - 1
+    return round(values[index], 3)
+
+
+def parse_server_timing(header: str) -> dict[str, float]:
+    """Длительности из заголовка Server-Timing: {"app": 12.4, "db": 8.0, ...}."""
+    timings = {}
+    for metric in header.split(","):
+        name, *params = metric.strip().split(";")
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "dur":
+                try:
+                    timings[name.strip()] = float(value)
+                except ValueError:
+                    pass
+    return timings
+
+
+def git_revision() -> dict:
+    """Коммит, на котором выполнен замер (None вне git-репозитория)."""
+    def git(*args: str) -> Optional[str]:
+        try:
+            return subprocess.run(
+                ["git", *args], cwd=project_root, capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        "commit": git("rev-parse", "--short", "HEAD"),
+        "subject": git("log", "-1", "--format=%s"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+    }
+
+
+class ScenarioStats:
+    """Результаты одного сценария."""
+
+    def __init__(self):
+        self.latencies: list[float] = []
+        self.errors = 0
+        self.statuses: dict[str, int] = {}
+        self.server_timing: dict[str, float] = {}
+
+    def record(self, latency: float, response: Optional[httpx.Response], ok: bool):
+        if not ok:
+            self.errors += 1
+        if response is None:
+            self.statuses["error"] = self.statuses.get("error", 0) + 1
+            return
+        status = str(response.status_code)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if ok:
+            self.latencies.append(latency)
+            for name, duration in parse_server_timing(response.headers.get("server-timing", "")).items():
+                self.server_timing[name] = self.server_timing.get(name, 0.0) + duration
+
+    def report(self, elapsed: float) -> dict:
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+        return {
+            "requests": count,
+            "errors": self.errors,
+            "statuses": self.statuses,
+            "duration_s": round(elapsed, 3),
+            "throughput_rps": round(count / elapsed, 2) if elapsed else 0.0,
+            "latency_ms": {
+                "mean": round(sum(latencies) / count, 3) if count else None,
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+                "max": round(latencies[-1], 3) if count else None,
+            },
+            "server_timing_ms": {
+                name: round(total / count, 3) for name, total in self.server_timing.items()
+            } if count else {},
+        }
+
+
+class LoadTest:
+    """Подготовка данных и запуск сценариев против работающего приложения."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.cookies = httpx.Cookies()
+        self.type_ids: list[int] = []
+        self.package_ids: list[str] = []
+        self.types_etag: Optional[str] = None
+        self.deep_cursor: Optional[str] = None
+
+    def client(self, cookies: Optional[httpx.Cookies] = None) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=self.args.base_url,
+            cookies=cookies,
+            timeout=self.args.timeout,
+            limits=httpx.Limits(max_connections=1, max_keepalive_connections=1),
+        )
+
+    async def prepare(self):
+        """Создать сессию с посылками и найти курсор глубокой страницы."""
+        args = self.args
+        async with self.client() as client:
+            response = await client.get("/packages/types")
+            response.raise_for_status()
+            self.type_ids = [item["id"] for item in response.json()]
+            self.types_etag = response.headers.get("etag")
+            if not self.type_ids:
+                raise SystemExit("Справочник типов посылок пуст")
+
+            rng = random.Random(args.random_seed)
+            log(f"Создание {args.seed} посылок...")
+            for start in range(0, args.seed, args.seed_chunk):
+                count = min(args.seed_chunk, args.seed - start)
+                body = [self.package_body(rng, start + index) for index in range(count)]
+                response = await client.post("/packages/bulk", json=body)
+                response.raise_for_status()
+                self.package_ids.extend(response.json()["package_ids"])
+            if not self.package_ids:
+                raise SystemExit("Нет посылок для сценариев чтения: задайте --seed больше 0")
+
+            self.cookies = httpx.Cookies(client.cookies)
+
+            # Курсор глубокой страницы: проходим страницы по next_cursor
+            pages = max(1, (len(self.package_ids) + args.size - 1) // args.size)
+            if args.deep_page > pages:
+                log(f"--deep-page {args.deep_page} больше числа страниц ({pages}), используется {pages}")
+                args.deep_page = pages
+            cursor = None
+            for _ in range(args.deep_page - 1):
+                params = {"size": args.size, "include_total": "false"}
+                if cursor:
+                    params["cursor"] = cursor
+                response = await client.get("/packages/", params=params)
+                response.raise_for_status()
+                cursor = response.json()["next_cursor"]
+            self.deep_cursor = cursor
+
+    def package_body(self, rng: random.Random, index: int) -> dict:
+        return {
+            "name": f"bench-{index}",
+            "weight": round(rng.uniform(0.1, 20.0), 3),
+            "type_id": rng.choice(self.type_ids),
+            "price": round(rng.uniform(10.0, 100_000.0), 2),
+        }
+
+    def scenarios(self) -> dict[str, Callable]:
+        """Сценарии: (клиент, генератор случайных чисел) -> (ответ, ожидаемые статусы)."""
+        size = self.args.size
+
+        async def types(client, rng):
+            return await client.get("/packages/types"), (200,)
+
+        async def types_not_modified(client, rng):
+            headers = {"If-None-Match": self.types_etag} if self.types_etag else {}
+            return await client.get("/packages/types", headers=headers), (304,)
+
+        async def get(client, rng):
+            return await client.get(f"/packages/{rng.choice(self.package_ids)}"), (200,)
+
+        async def list_first(client, rng):
+            return await client.get("/packages/", params={"size": size}), (200,)
+
+        async def list_filtered(client, rng):
+            params = rng.choice([
+                {"type_id": rng.choice(self.type_ids)},
+                {"has_shipping_cost": "true"},
+                {"has_shipping_cost": "false"},
+                {"type_id": rng.choice(self.type_ids), "has_shipping_cost": "true"},
+            ])
+            return await client.get("/packages/", params={"size": size, **params}), (200,)
+
+        async def list_deep_offset(client, rng):
+            params = {"size": size, "page": self.args.deep_page, "include_total": "false"}
+            return await client.get("/packages/", params=params), (200,)
+
+        async def list_deep_cursor(client, rng):
+            params = {"size": size, "include_total": "false"}
+            if self.deep_cursor:
+                params["cursor"] = self.deep_cursor
+            return await client.get("/packages/", params=params), (200,)
+
+        async def create(client, rng):
+            return await client.post("/packages/", json=self.package_body(rng, 0)), (200,)
+
+        return {
+            "types": types,
+            "types_not_modified": types_not_modified,
+            "get": get,
+            "list": list_first,
+            "list_filtered": list_filtered,
+            "list_deep_offset": list_deep_offset,
+            "list_deep_cursor": list_deep_cursor,
+            "create": create,
+        }
+
+    async def worker(
+        self,
+        scenario: Callable,
+        cookies: Optional[httpx.Cookies],
+        seed: int,
+        deadline: float,
+        stats: Optional[ScenarioStats],
+    ):
+        """Выполнять запросы сценария до deadline (без stats — прогрев)."""
+        rng = random.Random(seed)
+        async with self.client(cookies) as client:
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    response, expected = await scenario(client, rng)
+                except httpx.HTTPError:
+                    response, expected = None, ()
+                latency = (time.perf_counter() - started) * 1000
+                if stats is not None:
+                    ok = response is not None and response.status_code in expected
+                    stats.record(latency, response, ok)
+
+    async def run_scenario(self, name: str, scenario: Callable) -> dict:
+        args = self.args
+        # Создание посылок идет в собственной сессии каждой корутины, чтение — в подготовленной
+        cookies = None if name == "create" else self.cookies
+        if args.warmup > 0:
+            deadline = time.perf_counter() + args.warmup
+            await asyncio.gather(*(
+                self.worker(scenario, cookies, args.random_seed + index, deadline, None)
+                for index in range(args.concurrency)
+            ))
+
+        stats = ScenarioStats()
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(
+            self.worker(scenario, cookies, args.random_seed + index, deadline, stats)
+            for index in range(args.concurrency)
+        ))
+        report = stats.report(time.perf_counter() - started)
+
+        latency = report["latency_ms"]
+        if report["requests"]:
+            log(
+                f"{name:<20} {report['throughput_rps']:8.1f} запросов/с   "
+                f"p50 {latency['p50']:7.2f} мс   p95 {latency['p95']:7.2f} мс   "
+                f"p99 {latency['p99']:7.2f} мс   ошибок {report['errors']}"
+            )
+        else:
+            log(f"{name:<20} нет успешных запросов, ошибок {report['errors']}: {report['statuses']}")
+        return report
+
+    async def run(self) -> dict:
+        await self.prepare()
+        scenarios = self.scenarios()
+        results = {}
+        for name in self.args.scenarios:
+            results[name] = await self.run_scenario(name, scenarios[name])
+        return results
+
+
+def build_report(args: argparse.Namespace, results: dict) -> dict:
+    return {
+        "meta": {
+            **git_revision(),
+            "label": args.label,
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "base_url": args.base_url,
+            "python": platform.python_version(),
+            "params": {
+                key: getattr(args, key)
+                for key in ("concurrency", "duration", "warmup", "seed", "size", "deep_page", "random_seed")
+            },
+        },
+        "scenarios": results,
+    }
+
+
+def default_output() -> Path:
+    commit = git_revision()["commit"] or "local"
+    return project_root / "benchmarks" / "results" / f"load-{commit}.json"
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=20, help="одновременных клиентов")
+    parser.add_argument("--duration", type=float, default=15.0, help="длительность замера сценария, секунды")
+    parser.add_argument("--warmup", type=float, default=3.0, help="прогрев перед замером, секунды")
+    parser.add_argument("--seed", type=int, default=2000, help="посылок в сессии сценариев чтения")
+    parser.add_argument("--seed-chunk", type=int, default=1000, help="посылок в одном запросе /packages/bulk")
+    parser.add_argument("--size", type=int, default=20, help="размер страницы")
+    parser.add_argument("--deep-page", type=int, default=50, help="номер глубокой страницы")
+    parser.add_argument("--timeout", type=float, default=30.0, help="таймаут запроса, секунды")
+    parser.add_argument("--random-seed", type=int, default=42, help="seed генератора для воспроизводимости")
+    parser.add_argument("--label", default=None, help="метка отчета (например, описание изменения)")
+    parser.add_argument("--output", type=Path, default=None, help="файл отчета (по умолчанию benchmarks/results/load-<коммит>.json)")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    results = asyncio.run(LoadTest(args).run())
+
+    output = args.output or default_output()
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(build_report(args, results), ensure_ascii=False, indent=2))
+    log(f"Отчет сохранен: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Сериализация страницы GET /packages/.
+
+Сравнивает прежний путь ответа (PackageInfo в сервисе -> PackageResponse
+в роуте -> повторная валидация по response_model в FastAPI -> json.dumps)
+с текущим: словари из строк БД -> ORJSONResponse. Строки БД заменены
+объектами в памяти, поэтому замер показывает только стоимость
+преобразования и сериализации.
+
+Запуск (внешние сервисы не нужны):
+    python benchmarks/serialize_packages.py --size 100 --iterations 2000
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from types import SimpleNamespace
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import orjson
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from src.models.db import ShippingStatus
+from src.schemas.responses import PackageInfo, PackageResponse, PaginatedPackagesResponse
+from src.services.package_types import PackageTypes
+from src.services.shipping import format_shipping_cost
+
+TYPES = PackageTypes({1: "Электроника", 2: "Одежда", 3: "Книги", 4: "Продукты", 5: "Другое"})
+RESPONSE_FIELD = create_response_field(name="Response", type_=PaginatedPackagesResponse)
+
+
+def make_rows(size: int) -> list[SimpleNamespace]:
+    """Строки посылок, как их возвращает PackageRepository.get_by_session_id."""
+    session_id = uuid.uuid4()
+    now = datetime.utcnow()
+    return [
+        SimpleNamespace(
+            id=uuid.uuid4(),
+            name=f"Посылка {i}",
+            weight=0.1 + i % 50,
+            type_id=1 + i % 5,
+            price=1000.0 + i,
+            shipping_cost=None if i % 20 == 0 else Decimal("1349.85"),
+            shipping_status=ShippingStatus.PENDING if i % 20 == 0 else ShippingStatus.CALCULATED,
+            session_id=session_id,
+            created_at=now - timedelta(seconds=i),
+        )
+        for i in range(size)
+    ]
+
+
+async def legacy_response(rows: list[SimpleNamespace], size: int) -> bytes:
+    """Прежний путь: две модели на посылку и валидация по response_model."""
+    infos = [
+        PackageInfo(
+            id=pkg.id,
+            name=pkg.name,
+            weight=pkg.weight,
+            type_id=pkg.type_id,
+            type_name=TYPES.name(pkg.type_id),
+            price=pkg.price,
+            shipping_cost=format_shipping_cost(pkg.shipping_cost, pkg.shipping_status),
+            shipping_status=pkg.shipping_status,
+        )
+        for pkg in rows
+    ]
+    session_id = rows[0].session_id
+    content = PaginatedPackagesResponse(
+        packages=[
+            PackageResponse(
+                id=pkg.id,
+                name=pkg.name,
+                weight=pkg.weight,
+                type_id=pkg.type_id,
+                type_name=pkg.type_name,
+                price=pkg.price,
+                shipping_cost=pkg.shipping_cost,
+                shipping_status=pkg.shipping_status,
+                session_id=session_id,
+            )
+            for pkg in infos
+        ],
+        total=1000,
+        page=1,
+        size=size,
+        pages=1000 // size,
+        next_cursor=None,
+    )
+    serialized = await serialize_response(field=RESPONSE_FIELD, response_content=content)
+    return JSONResponse(serialized).body
+
+
+async def current_response(rows: list[SimpleNamespace], size: int) -> bytes:
+    """Текущий путь: словари из строк и ORJSONResponse."""
+    packages = [
+        {
+            "id": pkg.id,
+            "name": pkg.name,
+            "weight": pkg.weight,
+            "type_id": pkg.type_id,
+            "type_name": TYPES.name(pkg.type_id),
+            "price": pkg.price,
+            "shipping_cost": format_shipping_cost(pkg.shipping_cost, pkg.shipping_status),
+            "shipping_status": pkg.shipping_status,
+            "session_id": pkg.session_id,
+        }
+        for pkg in rows
+    ]
+    return ORJSONResponse({
+        "packages": packages,
+        "total": 1000,
+        "page": 1,
+        "size": size,
+        "pages": 1000 // size,
+        "next_cursor": None,
+    }).body
+
+
+async def measure(build, rows: list[SimpleNamespace], size: int, iterations: int) -> list[float]:
+    """Построить ответ iterations раз и вернуть время каждого в микросекундах."""
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await build(rows, size)
+        timings.append((time.perf_counter() - started) * 1_000_000)
+    return timings
+
+
+def report(title: str, timings: list[float]):
+    timings = sorted(timings)
+    p50 = timings[len(timings) // 2]
+    p99 = timings[int(len(timings) * 0.99)]
+    print(f"{title:<40} mean {statistics.fmean(timings):8.1f} мкс   p50 {p50:8.1f} мкс   p99 {p99:8.1f} мкс")
+
+
+async def run(size: int, iterations: int):
+    rows = make_rows(size)
+    # Оба пути должны давать один и тот же JSON
+    assert orjson.loads(await legacy_response(rows, size)) == orjson.loads(await current_response(rows, size))
+
+    for title, build in (("Pydantic x2 + response_model", legacy_response), ("dict + orjson", current_response)):
+        await measure(build, rows, size, iterations // 10)
+        report(f"{title}, {size} посылок", await measure(build, rows, size, iterations))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100, help="посылок на странице")
+    parser.add_argument("--iterations", type=int, default=2_000)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.size, args.iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Задержка запроса через middleware сессий.
+
+Сравнивает прежнюю реализацию на BaseHTTPMiddleware (воспроизведена ниже)
+с ASGI-реализацией из src.middleware.sessions. Запросы отправляются
+напрямую в ASGI-приложение, без сети и сервера, поэтому разница
+показывает собственные накладные расходы middleware.
+
+Запуск (внешние сервисы не нужны):
+    python benchmarks/session_middleware.py --requests 20000
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+from src.config.settings import SESSION_COOKIE_NAME, SESSION_MAX_AGE
+from src.middleware.sessions import ISSUED_COOKIE_NAME, SessionMiddleware
+from src.services.sessions import activity_tracker
+
+
+class LegacySessionMiddleware(BaseHTTPMiddleware):
+    """Реализация до перехода на ASGI: cookie выставляется в каждом ответе."""
+
+    async def dispatch(self, request: Request, call_next):
+        try:
+            session_id = request.cookies.get(SESSION_COOKIE_NAME)
+            if not session_id:
+                import uuid
+                session_id = str(uuid.uuid4())
+            request.state.session_id = session_id
+            activity_tracker.touch(session_id)
+            response = await call_next(request)
+            response.set_cookie(
+                key=SESSION_COOKIE_NAME,
+                value=session_id,
+                max_age=SESSION_MAX_AGE,
+                httponly=True,
+                secure=False,
+                samesite="lax"
+            )
+            return response
+        except Exception as e:
+            return JSONResponse(
+                status_code=500,
+                content={"error": {"message": f"Ошибка в SessionMiddleware: {str(e)}"}}
+            )
+
+
+async def endpoint(request: Request):
+    return PlainTextResponse(request.state.session_id)
+
+
+def build_app(middleware) -> Starlette:
+    app = Starlette(routes=[Route("/", endpoint)])
+    app.add_middleware(middleware)
+    return app
+
+
+def build_scope(cookie: bytes) -> dict:
+    headers = [(b"host", b"bench")]
+    if cookie:
+        headers.append((b"cookie", cookie))
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/",
+        "raw_path": b"/",
+        "query_string": b"",
+        "root_path": "",
+        "headers": headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+
+
+def build_channel():
+    """Создать receive/send одного запроса, как их передает ASGI-сервер."""
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+    response_complete = asyncio.Event()
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # Как ASGI-сервер: отключение приходит после завершения ответа
+        await response_complete.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and not message.get("more_body", False):
+            response_complete.set()
+
+    return receive, send
+
+
+async def measure(app: Starlette, cookie: bytes, requests: int) -> list[float]:
+    """Выполнить requests запросов и вернуть задержку каждого в микросекундах."""
+    timings = []
+    for _ in range(requests):
+        scope = build_scope(cookie)
+        receive, send = build_channel()
+
+        started = time.perf_counter()
+        await app(scope, receive, send)
+        timings.append((time.perf_counter() - started) * 1_000_000)
+    return timings
+
+
+def report(title: str, timings: list[float]):
+    timings = sorted(timings)
+    p50 = timings[len(timings) // 2]
+    p99 = timings[int(len(timings) * 0.99)]
+    print(f"{title:<45} mean {statistics.fmean(timings):8.1f} мкс   p50 {p50:8.1f} мкс   p99 {p99:8.1f} мкс")
+
+
+async def run(requests: int, warmup: int):
+    session_id = uuid.uuid4()
+    cookies = {
+        "без cookie": b"",
+        "с cookie сессии": f"{SESSION_COOKIE_NAME}={session_id}; "
+                           f"{ISSUED_COOKIE_NAME}={int(time.time())}".encode(),
+    }
+    apps = {
+        "BaseHTTPMiddleware": build_app(LegacySessionMiddleware),
+        "ASGI": build_app(SessionMiddleware),
+    }
+
+    for cookie_title, cookie in cookies.items():
+        for app_title, app in apps.items():
+            await measure(app, cookie, warmup)
+            timings = await measure(app, cookie, requests)
+            report(f"{app_title}, {cookie_title}", timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=10_000)
+    parser.add_argument("--warmup", type=int, default=1_000)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.requests, args.warmup))
+
+
+if __name__ == "__main__":
+    main()
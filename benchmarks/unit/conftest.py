@@ -0,0 +1,62 @@
+"""
+Общие фикстуры микробенчмарков (pytest-benchmark).
+
+Замеряют горячие участки кода приложения без внешних сервисов:
+БД и Redis заменены объектами в памяти.
+"""
+
+import asyncio
+import sys
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.models.db import ShippingStatus
+from src.services.package_types import PackageTypes
+
+TYPES = PackageTypes({1: "Электроника", 2: "Одежда", 3: "Книги", 4: "Продукты", 5: "Другое"})
+
+
+def make_rows(size: int) -> list[SimpleNamespace]:
+    """Строки посылок, как их возвращает PackageRepository.get_by_session_id."""
+    session_id = uuid.uuid4()
+    now = datetime.utcnow()
+    return [
+        SimpleNamespace(
+            id=uuid.uuid4(),
+            name=f"Посылка {i}",
+            weight=0.1 + i % 50,
+            type_id=1 + i % 5,
+            price=1000.0 + i,
+            shipping_cost=None if i % 20 == 0 else Decimal("1349.85"),
+            shipping_status=ShippingStatus.PENDING if i % 20 == 0 else ShippingStatus.CALCULATED,
+            session_id=session_id,
+            created_at=now - timedelta(seconds=i),
+        )
+        for i in range(size)
+    ]
+
+
+@pytest.fixture(name="make_rows")
+def make_rows_fixture():
+    return make_rows
+
+
+@pytest.fixture
+def package_types():
+    return TYPES
+
+
+@pytest.fixture
+def run():
+    """Выполнить корутину в отдельном event loop (время loop входит в замер)."""
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
@@ -0,0 +1,30 @@
+"""
+Микробенчмарки разбора тела POST /packages/bulk.
+"""
+
+import json
+
+import pytest
+
+from src.routes.packages import _bulk_adapter
+
+
+@pytest.fixture(params=[100, 1000])
+def bulk_body(request, package_types):
+    items = [
+        {"name": f"Посылка {i}", "weight": 0.5 + i % 30, "type_id": 1 + i % len(package_types), "price": 100.0 + i}
+        for i in range(request.param)
+    ]
+    return json.dumps(items).encode()
+
+
+def test_validate_bulk_json(benchmark, bulk_body):
+    """Разбор и валидация JSON-массива посылок."""
+    packages = benchmark(_bulk_adapter.validate_json, bulk_body)
+    assert packages
+
+
+def test_validate_package_types(benchmark, package_types):
+    """Проверка type_id посылок по справочнику типов."""
+    type_ids = [((index, "type_id"), 1 + index % len(package_types)) for index in range(1000)]
+    benchmark(package_types.validate, type_ids)
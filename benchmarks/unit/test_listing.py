@@ -0,0 +1,51 @@
+"""
+Микробенчмарки выборки посылок: GET /packages/ без БД.
+"""
+
+from unittest.mock import AsyncMock
+
+import pytest
+from fastapi.responses import ORJSONResponse
+
+from src.services.package_types import PackageTypeRegistry
+from src.services.packages import PackageService
+from src.utils.pagination import decode_cursor, encode_cursor
+
+
+@pytest.fixture
+def service(monkeypatch, package_types):
+    registry = PackageTypeRegistry()
+    registry._types = package_types
+    monkeypatch.setattr("src.services.packages.package_types", registry)
+
+    def make(rows):
+        repository = AsyncMock()
+        repository.get_by_session_id.return_value = (rows, 1000)
+        return PackageService(repository, AsyncMock())
+
+    return make
+
+
+@pytest.mark.parametrize("size", [20, 100])
+def test_listing_page(benchmark, run, service, make_rows, size):
+    """Страница посылок: строки -> словари -> тело ответа orjson."""
+    package_service = service(make_rows(size))
+
+    async def build():
+        packages, total, page, pages, next_cursor = await package_service.get_packages("session", 1, size)
+        return ORJSONResponse({
+            "packages": packages, "total": total, "page": page,
+            "size": size, "pages": pages, "next_cursor": next_cursor,
+        }).body
+
+    body = benchmark(lambda: run(build()))
+    assert body.startswith(b'{"packages":[')
+
+
+def test_cursor_roundtrip(benchmark, make_rows):
+    row = make_rows(1)[0]
+
+    def roundtrip():
+        return decode_cursor(encode_cursor(row.created_at, row.id))
+
+    assert benchmark(roundtrip) == (row.created_at, row.id)
@@ -0,0 +1,50 @@
+"""
+Микробенчмарки middleware: накладные расходы на запрос без обработчика.
+"""
+
+import time
+import uuid
+
+import pytest
+
+from src.config.settings import SESSION_COOKIE_NAME
+from src.middleware.metrics import MetricsMiddleware
+from src.middleware.sessions import ISSUED_COOKIE_NAME, SessionMiddleware
+
+
+async def endpoint(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+def make_scope(headers: list) -> dict:
+    return {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": "/packages/", "raw_path": b"/packages/",
+        "query_string": b"", "root_path": "", "headers": headers,
+        "client": ("127.0.0.1", 50000), "server": ("testserver", 80),
+    }
+
+
+@pytest.mark.parametrize("with_cookie", [False, True], ids=["new_session", "session_cookie"])
+def test_middleware_stack(benchmark, run, with_cookie):
+    """100 запросов через MetricsMiddleware и SessionMiddleware, как в приложении."""
+    app = MetricsMiddleware(SessionMiddleware(endpoint))
+    headers = []
+    if with_cookie:
+        cookie = f"{SESSION_COOKIE_NAME}={uuid.uuid4()}; {ISSUED_COOKIE_NAME}={int(time.time())}"
+        headers.append((b"cookie", cookie.encode()))
+
+    async def request():
+        for _ in range(100):
+            await app(make_scope(list(headers)), receive, send)
+
+    benchmark(lambda: run(request()))
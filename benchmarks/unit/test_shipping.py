@@ -0,0 +1,24 @@
+"""
+Микробенчмарки расчета стоимости доставки.
+"""
+
+from decimal import Decimal
+
+from src.models.db import ShippingStatus
+from src.services.shipping import calculate_shipping_cost, format_shipping_cost
+
+
+def test_calculate_shipping_cost(benchmark):
+    def batch():
+        return [calculate_shipping_cost(0.5 + i % 30, 100.0 + i, 92.5) for i in range(1000)]
+
+    assert len(benchmark(batch)) == 1000
+
+
+def test_format_shipping_cost(benchmark):
+    costs = [(Decimal("1349.85"), ShippingStatus.CALCULATED), (None, ShippingStatus.PENDING)] * 500
+
+    def batch():
+        return [format_shipping_cost(cost, status) for cost, status in costs]
+
+    assert len(benchmark(batch)) == 1000
@@ -0,0 +1,35 @@
+"""add_packages_created_at
+
+Revision ID: 8c3cf9536b52
+Revises: b5bcdedf7252
+Create Date: 2026-10-17 16:05:12.418203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c3cf9536b52'
+down_revision: Union[str, Sequence[str], None] = 'b5bcdedf7252'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Существующим посылкам проставляется время миграции,
+    # порядок среди них определяется по id
+    op.add_column('packages', sa.Column(
+        'created_at',
+        sa.DateTime(),
+        server_default=sa.text("(now() at time zone 'utc')"),
+        nullable=False
+    ))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('packages', 'created_at')
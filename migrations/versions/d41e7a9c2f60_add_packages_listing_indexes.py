@@ -0,0 +1,49 @@
+"""add_packages_listing_indexes
+
+Revision ID: d41e7a9c2f60
+Revises: 8c3cf9536b52
+Create Date: 2026-10-17 16:40:03.551902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41e7a9c2f60'
+down_revision: Union[str, Sequence[str], None] = '8c3cf9536b52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY не блокирует запись в таблицу,
+    # но не может выполняться внутри транзакции
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_packages_session_created', 'packages',
+            ['session_id', 'created_at', 'id'],
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_packages_session_type_created', 'packages',
+            ['session_id', 'type_id', 'created_at', 'id'],
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_packages_session_pending_created', 'packages',
+            ['session_id', 'created_at', 'id'],
+            postgresql_where=sa.text("shipping_cost = 'Не рассчитано'"),
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_packages_session_pending_created', table_name='packages', postgresql_concurrently=True)
+        op.drop_index('ix_packages_session_type_created', table_name='packages', postgresql_concurrently=True)
+        op.drop_index('ix_packages_session_created', table_name='packages', postgresql_concurrently=True)
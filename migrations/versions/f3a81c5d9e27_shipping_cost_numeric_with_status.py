@@ -0,0 +1,89 @@
+"""shipping_cost_numeric_with_status
+
+Revision ID: f3a81c5d9e27
+Revises: d41e7a9c2f60
+Create Date: 2026-10-17 17:12:48.903114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a81c5d9e27'
+down_revision: Union[str, Sequence[str], None] = 'd41e7a9c2f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+shipping_status = postgresql.ENUM('pending', 'calculated', 'failed', name='shipping_status', create_type=False)
+
+# Рассчитанная стоимость хранилась строкой вида "1349.85"
+NUMERIC_COST = r"shipping_cost ~ '^[0-9]+(\.[0-9]+)?$'"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 1. Удаляем частичный индекс по строковой стоимости: его условие
+    # несовместимо с новым типом столбца. DROP/CREATE INDEX CONCURRENTLY
+    # не блокируют запись, но не могут выполняться внутри транзакции.
+    # Индекс удаляется и создается вне транзакции миграции, поэтому
+    # обе операции идемпотентны: прерванную миграцию можно повторить
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_packages_session_pending_created', table_name='packages',
+                      postgresql_concurrently=True, if_exists=True)
+
+    # 2. Добавляем статус расчета
+    shipping_status.create(op.get_bind(), checkfirst=True)
+    op.add_column('packages', sa.Column(
+        'shipping_status', shipping_status, server_default='pending', nullable=False
+    ))
+
+    # 3. Переносим состояние из строкового значения стоимости
+    op.execute(f"UPDATE packages SET shipping_status = 'calculated' WHERE {NUMERIC_COST}")
+
+    # 4. Меняем тип стоимости: "Не рассчитано" и прочие нечисловые значения -> NULL
+    op.alter_column('packages', 'shipping_cost',
+               existing_type=sa.String(length=50),
+               type_=sa.Numeric(precision=12, scale=2),
+               existing_nullable=True,
+               server_default=None,
+               postgresql_using=f"CASE WHEN {NUMERIC_COST} THEN shipping_cost::numeric(12, 2) END")
+
+    # 5. Создаем частичный индекс по новому условию
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_packages_session_pending_created', 'packages',
+            ['session_id', 'created_at', 'id'],
+            postgresql_where=sa.text("shipping_status <> 'calculated'"),
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_packages_session_pending_created', table_name='packages',
+                      postgresql_concurrently=True, if_exists=True)
+
+    op.alter_column('packages', 'shipping_cost',
+               existing_type=sa.Numeric(precision=12, scale=2),
+               type_=sa.String(length=50),
+               existing_nullable=True,
+               postgresql_using="COALESCE(to_char(shipping_cost, 'FM9999999990.00'), 'Не рассчитано')")
+    op.execute("UPDATE packages SET shipping_cost = 'Не рассчитано' WHERE shipping_status <> 'calculated'")
+
+    op.drop_column('packages', 'shipping_status')
+    shipping_status.drop(op.get_bind(), checkfirst=True)
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_packages_session_pending_created', 'packages',
+            ['session_id', 'created_at', 'id'],
+            postgresql_where=sa.text("shipping_cost = 'Не рассчитано'"),
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
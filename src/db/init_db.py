@@ -2,9 +2,11 @@ from sqlalchemy import text
 
 from src.db.session import async_session, engine
 from src.models.db import Base, PackageType
+from src.services.package_types import notify_package_types_changed
 
 
 async def init_package_types():
+    created = False
     async with async_session() as session:
         async with session.begin():
             # Проверяем, есть ли уже типы посылок
@@ -25,6 +27,11 @@ async def init_package_types():
                     session.add(package_type)
                 
                 await session.commit()
+                created = True
+
+    if created:
+        # Экземпляры, запущенные с пустой таблицей, загрузят типы заново
+        await notify_package_types_changed()
 
 
 async def create_tables():
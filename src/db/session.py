@@ -1,11 +1,66 @@
+import time
 from collections.abc import Generator
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
-from src.config.settings import REAL_DATABASE_URL
+from src.config.settings import (
+    DB_ECHO,
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_STATEMENT_CACHE_SIZE,
+    REAL_DATABASE_URL,
+)
+from src.utils.metrics import record_db_query
 
-engine = create_async_engine(REAL_DATABASE_URL, future=True, echo=True)
+
+def create_db_engine(
+    url: str = REAL_DATABASE_URL,
+    echo: bool = DB_ECHO,
+    pool_size: int = DB_POOL_SIZE,
+    max_overflow: int = DB_MAX_OVERFLOW,
+    pool_recycle: int = DB_POOL_RECYCLE,
+    pool_timeout: int = DB_POOL_TIMEOUT,
+    pool_pre_ping: bool = DB_POOL_PRE_PING,
+    statement_cache_size: int = DB_STATEMENT_CACHE_SIZE,
+) -> AsyncEngine:
+    """Создать асинхронный движок БД с настройками пула из settings."""
+    return create_async_engine(
+        url,
+        future=True,
+        echo=echo,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_recycle=pool_recycle,
+        pool_timeout=pool_timeout,
+        pool_pre_ping=pool_pre_ping,
+        connect_args={
+            # Кеш asyncpg и кеш подготовленных выражений диалекта SQLAlchemy
+            "statement_cache_size": statement_cache_size,
+            "prepared_statement_cache_size": statement_cache_size,
+        },
+    )
+
+
+def instrument_engine(sync_engine: Engine):
+    """Замерять длительность и число SQL-запросов движка (метрики и Server-Timing)."""
+    
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_started = time.perf_counter()
+    
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        record_db_query(time.perf_counter() - context._query_started)
+
+
+engine = create_db_engine()
+instrument_engine(engine.sync_engine)
 async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 
@@ -4,39 +4,157 @@
 Содержит функции для получения курсов валют.
 """
 
+import asyncio
+from typing import Optional
+
 import aiohttp
-import json
-from src.config.settings import CBR_API_TIMEOUT, CBR_API_URL
+
+from src.config.settings import (
+    CBR_API_BACKOFF,
+    CBR_API_POOL_LIMIT,
+    CBR_API_RETRIES,
+    CBR_API_TIMEOUT,
+    CBR_API_URL,
+)
 from src.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
 
+class CBRAPIError(Exception):
+    """Ошибка получения данных от API ЦБ РФ."""
+
+    def __init__(self, message: str, retryable: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class CBRClient:
+    """
+    Клиент API ЦБ РФ.
+
+    Держит одну ClientSession с пулом keep-alive соединений на все запросы,
+    повторяет запрос с экспоненциальной задержкой при сетевых ошибках
+    и ответах 5xx. Сессия создается при первом запросе и должна быть
+    закрыта через close() при завершении приложения.
+    """
+
+    def __init__(
+        self,
+        url: str = CBR_API_URL,
+        pool_limit: int = CBR_API_POOL_LIMIT,
+        retries: int = CBR_API_RETRIES,
+        backoff: float = CBR_API_BACKOFF,
+    ):
+        self.url = url
+        self.pool_limit = pool_limit
+        self.retries = retries
+        self.backoff = backoff
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Получить HTTP-сессию, привязанную к текущему event loop."""
+        loop = asyncio.get_running_loop()
+        if self._session is not None and self._loop is not loop:
+            await self._close_stale_session()
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_limit, ttl_dns_cache=300),
+            )
+            self._loop = loop
+        return self._session
+
+    async def _close_stale_session(self):
+        """Закрыть сессию, созданную в другом event loop."""
+        session, self._session = self._session, None
+        if session.closed:
+            return
+        try:
+            await session.close()
+        except RuntimeError as e:
+            # Loop сессии уже закрыт: соединения нельзя закрыть через него,
+            # но сессия и пул помечены закрытыми
+            logger.debug("HTTP-сессия прежнего event loop закрыта с ошибкой: %s", e)
+
+    async def fetch_usd_rub_rate(self, timeout: float = CBR_API_TIMEOUT) -> float:
+        """
+        Получить курс USD к RUB.
+
+        Args:
+            timeout: Таймаут одной попытки в секундах
+
+        Returns:
+            Курс USD к RUB
+
+        Raises:
+            Exception: При ошибке получения курса после всех попыток
+        """
+        attempt = 0
+        while True:
+            try:
+                return await self._request_usd_rub_rate(timeout)
+            except (aiohttp.ClientError, asyncio.TimeoutError, CBRAPIError) as e:
+                retryable = not isinstance(e, CBRAPIError) or e.retryable
+                if not retryable or attempt >= self.retries:
+                    logger.error("Ошибка получения курса USD/RUB: %s", e)
+                    raise
+                delay = self.backoff * 2 ** attempt
+                attempt += 1
+                logger.warning(
+                    "Ошибка получения курса USD/RUB: %s, повтор %s/%s через %.1f с",
+                    e, attempt, self.retries, delay
+                )
+                await asyncio.sleep(delay)
+            except Exception as e:
+                logger.error("Ошибка получения курса USD/RUB: %s", e)
+                raise
+
+    async def _request_usd_rub_rate(self, timeout: float) -> float:
+        """Выполнить одну попытку запроса курса."""
+        session = await self.get_session()
+        async with session.get(self.url, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            if response.status != 200:
+                raise CBRAPIError(
+                    f"Ошибка API ЦБ: статус {response.status}",
+                    retryable=response.status >= 500,
+                )
+
+            # ЦБ отдает JSON с Content-Type application/javascript
+            data = await response.json(content_type=None)
+
+        usd_rate = data["Valute"]["USD"]["Value"]
+        logger.info("Получен курс USD/RUB: %s", usd_rate)
+        return float(usd_rate)
+
+    async def close(self):
+        """Закрыть HTTP-сессию и соединения пула."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+    def reset(self):
+        """Забыть сессию без закрытия (например, унаследованную при fork)."""
+        self._session = None
+        self._loop = None
+
+
+# Глобальный клиент API ЦБ РФ
+cbr_client = CBRClient()
+
+
 async def fetch_usd_rub_rate(timeout: float = CBR_API_TIMEOUT) -> float:
     """
     Получить курс USD к RUB от ЦБ РФ.
-    
+
     Args:
         timeout: Таймаут запроса в секундах
-        
+
     Returns:
         Курс USD к RUB
-        
+
     Raises:
         Exception: При ошибке получения курса
     """
-    try:
-        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout)) as session:
-            async with session.get(CBR_API_URL) as response:
-                if response.status == 200:
-                    text = await response.text()
-                    data = json.loads(text)
-                    
-                    usd_rate = data["Valute"]["USD"]["Value"]
-                    logger.info(f"Получен курс USD/RUB: {usd_rate}")
-                    return float(usd_rate)
-                else:
-                    raise Exception(f"Ошибка API ЦБ: статус {response.status}")
-    except Exception as e:
-        logger.error(f"Ошибка получения курса USD/RUB: {e}")
-        raise
+    return await cbr_client.fetch_usd_rub_rate(timeout)
@@ -1,3 +1,4 @@
+import asyncio
 import sys
 from contextlib import asynccontextmanager
 from pathlib import Path
@@ -10,12 +11,18 @@ from fastapi.routing import APIRouter
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from src.config.settings import APP_NAME, APP_VERSION, DEBUG
+from src.config.settings import APP_NAME, APP_VERSION, DEBUG, RATE_REFRESH_ENABLED
 from src.db.init_db import create_tables, init_package_types
+from src.external.cbr_api import cbr_client
+from src.middleware.metrics import MetricsMiddleware
 from src.middleware.sessions import SessionMiddleware
 from src.routes.handlers import package_router
-from src.services.shipping import get_usd_rub_rate
+from src.routes.metrics import metrics_router
+from src.services.package_types import load_package_types
+from src.services.sessions import activity_tracker, known_sessions
+from src.services.shipping import get_usd_rub_rate, run_rate_refresher
 from src.utils.logging import get_logger, setup_logging
+from src.utils.redis.invalidation import listen_invalidations
 from src.utils.redis.redis_cache import cache
 
 # Инициализируем логирование
@@ -25,6 +32,7 @@ logger = get_logger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    background_tasks: list[asyncio.Task] = []
     try:
         logger.info("Запуск приложения...")
         await create_tables()
@@ -32,6 +40,7 @@ async def lifespan(app: FastAPI):
 
         logger.info("Начинаю инициализацию типов посылок...")
         await init_package_types()
+        await load_package_types()
         logger.info("Типы посылок инициализированы")
 
         logger.info("Инициализация Redis кеша...")
@@ -39,16 +48,27 @@ async def lifespan(app: FastAPI):
             await get_usd_rub_rate()
             logger.info("Курс доллара к рублю загружен в кеш")
         except Exception as e:
-            logger.error(f"Ошибка загрузки курса в кеш: {e}")
+            logger.error("Ошибка загрузки курса в кеш: %s", e)
         logger.info("Redis кеш инициализирован")
 
+        background_tasks.append(asyncio.create_task(listen_invalidations()))
+        background_tasks.append(asyncio.create_task(activity_tracker.run()))
+        if RATE_REFRESH_ENABLED:
+            background_tasks.append(asyncio.create_task(run_rate_refresher()))
+            logger.info("Фоновое обновление курса запущено")
+
         logger.info("Приложение готово к работе!")
         yield
     except Exception as e:
-        logger.error(f"Критическая ошибка в lifespan: {e}", exc_info=True)
+        logger.error("Критическая ошибка в lifespan: %s", e, exc_info=True)
         raise
     finally:
         logger.info("Завершение lifespan")
+        logger.info("Статистика кеша сессий: %s", known_sessions.stats())
+        for task in background_tasks:
+            task.cancel()
+        await asyncio.gather(*background_tasks, return_exceptions=True)
+        await cbr_client.close()
         await cache.close()
 
 
@@ -63,9 +83,11 @@ app = FastAPI(
 )
 
 app.add_middleware(SessionMiddleware)
+app.add_middleware(MetricsMiddleware)
 main_api_router = APIRouter()
 main_api_router.include_router(package_router, prefix="/packages", tags=["Посылки"])
 app.include_router(main_api_router)
+app.include_router(metrics_router)
 
 if __name__=="__main__":
     uvicorn.run(app, host='localhost', port=8000)
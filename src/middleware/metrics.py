@@ -0,0 +1,68 @@
+"""
+Middleware для замера длительности запросов.
+"""
+
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.utils.metrics import RequestTimings, http_request_duration, request_timings
+
+
+class MetricsMiddleware:
+    """
+    Middleware для замера длительности запросов.
+    
+    Собирает замеры запроса (время в БД, обращения к кешу, отправка задач
+    в Celery), добавляет их в заголовок Server-Timing ответа и учитывает
+    длительность запроса в метрике http_request_duration_seconds.
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        timings = RequestTimings()
+        token = request_timings.set(timings)
+        started = time.perf_counter()
+        status_code = 500
+        
+        async def send_with_timing(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("server-timing", timings.server_timing(time.perf_counter() - started))
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            http_request_duration.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=self._route_label(scope),
+                status=status_code,
+            )
+            request_timings.reset(token)
+    
+    @staticmethod
+    def _route_label(scope: Scope) -> str:
+        """
+        Шаблон пути маршрута для метки метрики.
+        
+        Используется шаблон, а не сам путь, чтобы ID посылок не попадали
+        в метки. Маршруты Starlette без шаблона (документация API)
+        подписываются путем, несовпавшие запросы — общей меткой.
+        """
+        route = scope.get("route")
+        if route is not None:
+            return route.path
+        if "endpoint" in scope:
+            return scope["path"]
+        return "<unmatched>"
@@ -2,52 +2,102 @@
 Middleware для управления сессиями пользователей.
 """
 
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+import time
+import uuid
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import cookie_parser
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.config.settings import SESSION_COOKIE_NAME, SESSION_MAX_AGE, SESSION_RENEW_BEFORE
+from src.services.sessions import activity_tracker
 
-from src.config.settings import SESSION_COOKIE_NAME, SESSION_MAX_AGE
+# Cookie с временем выдачи cookie сессии: по нему видно, когда ее пора продлить
+ISSUED_COOKIE_NAME = f"{SESSION_COOKIE_NAME}_issued"
 
 
-class SessionMiddleware(BaseHTTPMiddleware):
+class SessionMiddleware:
     """
     Middleware для управления сессиями пользователей.
     
     Автоматически создает сессию для каждого нового пользователя
     и добавляет session_id в состояние запроса.
+    
+    Реализовано как ASGI middleware без BaseHTTPMiddleware: не оборачивает
+    запрос в отдельную задачу и не буферизует потоковые ответы. Cookie
+    отправляется только новой сессии или сессии, срок которой подходит к концу.
     """
     
-    async def dispatch(self, request: Request, call_next):
+    def __init__(self, app: ASGIApp, max_age: int = SESSION_MAX_AGE, renew_before: int = SESSION_RENEW_BEFORE):
+        self.app = app
+        self.max_age = max_age
+        self.renew_before = renew_before
+        # secure=False: в продакшене должно быть Secure
+        self.cookie_attributes = f"; HttpOnly; Max-Age={max_age}; Path=/; SameSite=lax"
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
         """Обработать запрос с управлением сессией."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        response_started = False
+        
         try:
-            # Получаем session_id из cookies
-            session_id = request.cookies.get(SESSION_COOKIE_NAME)
+            cookies = self._get_cookies(scope)
+            session_id = cookies.get(SESSION_COOKIE_NAME)
             
-            if not session_id:
+            if session_id:
+                renew = self._needs_renewal(cookies.get(ISSUED_COOKIE_NAME))
+            else:
                 # Создаем новую сессию
-                import uuid
                 session_id = str(uuid.uuid4())
+                renew = True
             
             # Добавляем session_id в состояние запроса
-            request.state.session_id = session_id
-            
-            # Обрабатываем запрос
-            response = await call_next(request)
+            scope.setdefault("state", {})["session_id"] = session_id
+            activity_tracker.touch(session_id)
             
-            # Устанавливаем cookie с session_id
-            response.set_cookie(
-                key=SESSION_COOKIE_NAME,
-                value=session_id,
-                max_age=SESSION_MAX_AGE,
-                httponly=True,
-                secure=False,  # В продакшене должно быть True
-                samesite="lax"
-            )
+            async def send_with_cookie(message: Message):
+                nonlocal response_started
+                if message["type"] == "http.response.start":
+                    response_started = True
+                    if renew:
+                        self._set_cookies(message, session_id)
+                await send(message)
             
-            return response
+            # Обрабатываем запрос
+            await self.app(scope, receive, send_with_cookie)
             
         except Exception as e:
-            return JSONResponse(
+            if response_started:
+                raise
+            response = JSONResponse(
                 status_code=500,
                 content={"error": {"message": f"Ошибка в SessionMiddleware: {str(e)}"}}
             )
+            await response(scope, receive, send)
+    
+    @staticmethod
+    def _get_cookies(scope: Scope) -> dict[str, str]:
+        """Разобрать заголовок Cookie из scope."""
+        for name, value in scope["headers"]:
+            if name == b"cookie":
+                return cookie_parser(value.decode("latin-1"))
+        return {}
+    
+    def _needs_renewal(self, issued_at: Optional[str]) -> bool:
+        """Пора ли выдать cookie заново (время выдачи неизвестно или срок истекает)."""
+        try:
+            expires_at = int(issued_at) + self.max_age
+        except (TypeError, ValueError):
+            return True
+        return expires_at - time.time() < self.renew_before
+    
+    def _set_cookies(self, message: Message, session_id: str):
+        """Добавить в ответ cookie сессии и времени ее выдачи."""
+        headers = MutableHeaders(scope=message)
+        headers.append("set-cookie", f"{SESSION_COOKIE_NAME}={session_id}{self.cookie_attributes}")
+        headers.append("set-cookie", f"{ISSUED_COOKIE_NAME}={int(time.time())}{self.cookie_attributes}")
@@ -2,10 +2,23 @@
 Модели базы данных.
 """
 
+import enum
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Enum,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    Numeric,
+    String,
+    Text,
+    text,
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
@@ -13,6 +26,13 @@ from sqlalchemy.orm import relationship
 Base = declarative_base()
 
 
+class ShippingStatus(str, enum.Enum):
+    """Статус расчета стоимости доставки."""
+    PENDING = "pending"
+    CALCULATED = "calculated"
+    FAILED = "failed"
+
+
 class PackageType(Base):
     """Модель типа посылки."""
     __tablename__ = "package_types"
@@ -36,6 +56,12 @@ class Session(Base):
     packages = relationship("Package", back_populates="session")
 
 
+# Условие частичного индекса ix_packages_session_pending_created. Запросы
+# подставляют его как есть, а не статус параметром: иначе в generic-плане
+# подготовленного запроса PostgreSQL не может использовать индекс
+PENDING_SHIPPING_CONDITION = "shipping_status <> 'calculated'"
+
+
 class Package(Base):
     """Модель посылки."""
     __tablename__ = "packages"
@@ -44,7 +70,19 @@ class Package(Base):
     name = Column(String(255), nullable=False)
     weight = Column(Float, nullable=False)
     price = Column(Float, nullable=False)
-    shipping_cost = Column(String(50), default="Не рассчитано")
+    shipping_cost = Column(Numeric(12, 2), nullable=True)
+    shipping_status = Column(
+        Enum(ShippingStatus, name="shipping_status", values_callable=lambda e: [m.value for m in e]),
+        default=ShippingStatus.PENDING,
+        server_default=ShippingStatus.PENDING.value,
+        nullable=False
+    )
+    created_at = Column(
+        DateTime,
+        default=datetime.utcnow,
+        server_default=text("(now() at time zone 'utc')"),
+        nullable=False
+    )
     
     # Внешние ключи
     type_id = Column(Integer, ForeignKey("package_types.id"), nullable=False)
@@ -53,3 +91,14 @@ class Package(Base):
     # Связи
     type = relationship("PackageType", back_populates="packages")
     session = relationship("Session", back_populates="packages")
+
+    # Индексы под выборку посылок сессии (фильтры + сортировка от новых к старым)
+    __table_args__ = (
+        Index("ix_packages_session_created", "session_id", "created_at", "id"),
+        Index("ix_packages_session_type_created", "session_id", "type_id", "created_at", "id"),
+        Index(
+            "ix_packages_session_pending_created",
+            "session_id", "created_at", "id",
+            postgresql_where=text(PENDING_SHIPPING_CONDITION)
+        ),
+    )
@@ -3,12 +3,14 @@
 """
 
 import uuid
+from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import func, select
+from sqlalchemy import Insert, func, insert, select, text, tuple_
 
+from src.config.settings import BULK_INSERT_CHUNK
 from src.db.session import AsyncSession
-from src.models.db import Package, PackageType
+from src.models.db import PENDING_SHIPPING_CONDITION, Package, PackageType, ShippingStatus
 
 
 class PackageRepository:
@@ -21,14 +23,53 @@ class PackageRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
     
-    async def create(self, package_data: dict) -> Package:
-        """Создать новую посылку."""
-        package = Package(**package_data)
-        self.session.add(package)
+    async def create(self, package_data: dict, session_upsert: Optional[Insert] = None) -> Package:
+        """
+        Создать новую посылку.
+        
+        Посылка вставляется одним INSERT ... RETURNING без последующего
+        refresh. Если передан session_upsert (см. SessionRepository.build_upsert),
+        сессия создается в том же запросе через CTE.
+        """
+        statement = insert(Package).values(**package_data).returning(Package)
+        if session_upsert is not None:
+            statement = statement.add_cte(session_upsert.cte("ensure_session"))
+        
+        result = await self.session.execute(statement)
+        package = result.scalar_one()
         await self.session.commit()
-        await self.session.refresh(package)
         return package
     
+    async def create_many(
+        self,
+        packages_data: list[dict],
+        session_upsert: Optional[Insert] = None,
+        chunk_size: int = BULK_INSERT_CHUNK
+    ) -> list[uuid.UUID]:
+        """
+        Создать несколько посылок в одной транзакции.
+        
+        Посылки вставляются многострочными INSERT ... RETURNING id
+        по chunk_size строк. Сессия (session_upsert) создается CTE
+        первого INSERT.
+        
+        Returns:
+            ID созданных посылок в порядке packages_data
+        """
+        package_ids = []
+        try:
+            for start in range(0, len(packages_data), chunk_size):
+                statement = insert(Package).values(packages_data[start:start + chunk_size]).returning(Package.id)
+                if session_upsert is not None and start == 0:
+                    statement = statement.add_cte(session_upsert.cte("ensure_session"))
+                result = await self.session.execute(statement)
+                package_ids.extend(result.scalars().all())
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+        return package_ids
+    
     async def get_by_id(self, package_id: str) -> Optional[Package]:
         """Получить посылку по ID."""
         result = await self.session.execute(
@@ -42,9 +83,24 @@ class PackageRepository:
         page: int = 1, 
         size: int = 10,
         type_id: Optional[int] = None,
-        has_shipping_cost: Optional[bool] = None
-    ) -> tuple[list[Package], int]:
-        """Получить посылки по session_id с пагинацией и фильтрацией."""
+        has_shipping_cost: Optional[bool] = None,
+        after: Optional[tuple[datetime, uuid.UUID]] = None,
+        include_total: bool = True
+    ) -> tuple[list[Package], Optional[int]]:
+        """
+        Получить посылки по session_id с пагинацией и фильтрацией.
+        
+        Посылки отсортированы от новых к старым. Если передан after —
+        ключ (created_at, id) последней посылки предыдущей страницы,
+        используется keyset-пагинация и page игнорируется: стоимость
+        запроса не зависит от глубины страницы.
+        
+        Общее количество при постраничной выборке считается в том же
+        запросе оконной функцией count(*) OVER (); при keyset-пагинации
+        окно видит только записи после курсора, поэтому выполняется
+        отдельный COUNT. При include_total=False количество не считается
+        и возвращается None.
+        """
         query = select(Package).where(Package.session_id == uuid.UUID(session_id))
         
         # Применяем фильтры
@@ -53,34 +109,52 @@ class PackageRepository:
         
         if has_shipping_cost is not None:
             if has_shipping_cost:
-                query = query.where(Package.shipping_cost != "Не рассчитано")
+                query = query.where(Package.shipping_status == ShippingStatus.CALCULATED)
             else:
-                query = query.where(Package.shipping_cost == "Не рассчитано")
+                query = query.where(text(PENDING_SHIPPING_CONDITION))
         
-        # Подсчитываем общее количество
-        count_query = select(func.count()).select_from(query.subquery())
-        total_result = await self.session.execute(count_query)
-        total = total_result.scalar()
+        filtered_query = query
         
         # Применяем пагинацию
-        offset = (page - 1) * size
-        query = query.offset(offset).limit(size).order_by(Package.id.desc())
+        query = query.order_by(Package.created_at.desc(), Package.id.desc()).limit(size)
+        if after is not None:
+            query = query.where(tuple_(Package.created_at, Package.id) < tuple_(*after))
+        else:
+            query = query.offset((page - 1) * size)
+        
+        if not include_total:
+            result = await self.session.execute(query)
+            return list(result.scalars().all()), None
         
-        result = await self.session.execute(query)
-        packages = result.scalars().all()
+        if after is not None:
+            result = await self.session.execute(query)
+            return list(result.scalars().all()), await self._count(filtered_query)
         
-        return list(packages), total
+        result = await self.session.execute(query.add_columns(func.count().over().label("total")))
+        rows = result.all()
+        if rows:
+            return [row[0] for row in rows], rows[0].total
+        
+        # Страница за пределами выборки: окно пустое, считаем отдельно
+        total = 0 if page == 1 else await self._count(filtered_query)
+        return [], total
+    
+    async def _count(self, query) -> int:
+        """Посчитать количество строк запроса."""
+        result = await self.session.execute(select(func.count()).select_from(query.subquery()))
+        return result.scalar()
     
     async def get_all_types(self) -> list[PackageType]:
         """Получить все типы посылок."""
         result = await self.session.execute(select(PackageType))
         return list(result.scalars().all())
     
-    async def update_shipping_cost(self, package_id: str, shipping_cost: str) -> Optional[Package]:
+    async def update_shipping_cost(self, package_id: str, shipping_cost: float) -> Optional[Package]:
         """Обновить стоимость доставки посылки."""
         package = await self.get_by_id(package_id)
         if package:
             package.shipping_cost = shipping_cost
+            package.shipping_status = ShippingStatus.CALCULATED
             await self.session.commit()
             await self.session.refresh(package)
         return package
@@ -6,7 +6,8 @@ import uuid
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import select
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import Insert, insert
 
 from src.db.session import AsyncSession
 from src.models.db import Session
@@ -41,6 +42,21 @@ class SessionRepository:
         await self.session.refresh(session)
         return session
     
+    @staticmethod
+    def build_upsert(session_id: str) -> Insert:
+        """
+        Построить INSERT сессии, который ничего не делает, если она уже есть.
+        
+        Используется как CTE в INSERT посылки, чтобы проверка сессии
+        не требовала отдельных запросов.
+        """
+        now = datetime.utcnow()
+        return (
+            insert(Session)
+            .values(id=uuid.UUID(session_id), created_at=now, last_activity=now)
+            .on_conflict_do_nothing(index_elements=[Session.id])
+        )
+    
     async def update_activity(self, session_id: str) -> Optional[Session]:
         """Обновить время последней активности сессии."""
         session = await self.get_by_id(session_id)
@@ -49,3 +65,18 @@ class SessionRepository:
             await self.session.commit()
             await self.session.refresh(session)
         return session
+    
+    async def bulk_update_activity(self, session_ids: list[str], last_activity: datetime) -> int:
+        """
+        Обновить время последней активности группы сессий одним UPDATE (без commit).
+        
+        Returns:
+            Количество обновленных сессий
+        """
+        result = await self.session.execute(
+            update(Session)
+            .where(Session.id.in_([uuid.UUID(session_id) for session_id in session_ids]))
+            .values(last_activity=last_activity)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
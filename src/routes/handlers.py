@@ -4,13 +4,16 @@ from fastapi import APIRouter, Depends, Query, Request
 
 from src.db.session import AsyncSession, get_db
 from src.routes.packages import (
+    NDJSON_CONTENT_TYPE,
     _create_new_package,
+    _create_packages_bulk,
     _get_all_packages_types,
     _get_package_info,
     _get_user_packages,
 )
 from src.schemas.requests import PackageCreate
 from src.schemas.responses import (
+    BulkTaskResponse,
     PackageGetTypes,
     PackageInfo,
     PaginatedPackagesResponse,
@@ -32,6 +35,36 @@ async def create_package(body: PackageCreate, request: Request, db: AsyncSession
     return await _create_new_package(body, session_id, db)
 
 
+@package_router.post(
+    "/bulk",
+    response_model=BulkTaskResponse,
+    tags=["Посылки"],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": {"$ref": "#/components/schemas/PackageCreate"}}
+                },
+                NDJSON_CONTENT_TYPE: {
+                    "schema": {"$ref": "#/components/schemas/PackageCreate"}
+                },
+            },
+        }
+    },
+)
+async def create_packages_bulk(request: Request, db: AsyncSession = Depends(get_db)) -> BulkTaskResponse:
+    """
+    Создать несколько посылок для текущей сессии одним запросом.
+
+    Принимает JSON-массив посылок или NDJSON (по посылке на строку).
+    Стоимость доставки рассчитывается одной задачей Celery.
+    Подробная документация доступна в README.md.
+    """
+    session_id = request.state.session_id
+    return await _create_packages_bulk(request, session_id, db)
+
+
 @package_router.get("/", response_model=PaginatedPackagesResponse, tags=["Посылки"])
 async def get_my_packages(
     request: Request,
@@ -39,20 +72,23 @@ async def get_my_packages(
     page: int = Query(1, ge=1, description="Номер страницы (начиная с 1)"),
     size: int = Query(10, ge=1, le=100, description="Размер страницы (от 1 до 100)"),
     type_id: Optional[int] = Query(None, description="Фильтр по типу посылки (ID типа)"),
-    has_shipping_cost: Optional[bool] = Query(None, description="Фильтр по наличию рассчитанной стоимости доставки")
+    has_shipping_cost: Optional[bool] = Query(None, description="Фильтр по наличию рассчитанной стоимости доставки"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (next_cursor из предыдущего ответа); при указании page игнорируется"),
+    include_total: bool = Query(True, description="Считать общее количество посылок (total и pages); false ускоряет выборку")
 ):
     session_id = request.state.session_id
-    return await _get_user_packages(session_id, db, page, size, type_id, has_shipping_cost)
+    return await _get_user_packages(session_id, db, page, size, type_id, has_shipping_cost, cursor, include_total)
 
 
 @package_router.get("/types", response_model=list[PackageGetTypes], tags=["Типы посылок"])
-async def get_types_packages(db: AsyncSession = Depends(get_db)):
+async def get_types_packages(request: Request, db: AsyncSession = Depends(get_db)):
     """
     Получить все доступные типы посылок.
 
+    Поддерживает условные запросы: ETag и If-None-Match (304 Not Modified).
     Подробная документация доступна в README.md.
     """
-    return await _get_all_packages_types(db)
+    return await _get_all_packages_types(request, db)
 
 
 
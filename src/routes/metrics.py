@@ -0,0 +1,35 @@
+"""
+Роут метрик в формате Prometheus.
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from src.utils.celery.metrics import (
+    WORKER_METRICS_KEY,
+    WORKER_METRICS_META_KEY,
+    worker_metrics_snapshot,
+)
+from src.utils.metrics import MetricsRegistry, registry
+from src.utils.redis.redis_cache import cache
+
+metrics_router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def get_metrics() -> PlainTextResponse:
+    """
+    Метрики в текстовом формате Prometheus.
+
+    Метрики процесса приложения дополняются метриками задач Celery,
+    которые worker'ы суммируют в Redis по всем процессам.
+    """
+    worker_registry = MetricsRegistry()
+    meta = await cache.hgetall(WORKER_METRICS_META_KEY)
+    if meta:
+        values = await cache.hgetall(WORKER_METRICS_KEY)
+        worker_registry.merge(worker_metrics_snapshot(meta, values))
+    content = registry.render() + worker_registry.render()
+    return PlainTextResponse(content, media_type=PROMETHEUS_CONTENT_TYPE)
@@ -3,20 +3,32 @@
 """
 
 import math
-from typing import Optional
+from typing import Annotated, Any, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse
+from pydantic import Field, TypeAdapter, ValidationError
 
+from src.config.settings import BULK_MAX_ITEM_BYTES, BULK_MAX_ITEMS, PACKAGE_TYPES_MAX_AGE
 from src.repositories.packages import PackageRepository
 from src.repositories.sessions import SessionRepository
 from src.schemas.requests import PackageCreate
+from src.services.package_types import UnknownPackageTypeError
 from src.services.packages import PackageService
 from src.utils.logging import get_logger
+from src.utils.pagination import InvalidCursorError
 
 logger = get_logger(__name__)
 
 package_router = APIRouter()
 
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+
+_bulk_adapter = TypeAdapter(Annotated[list[PackageCreate], Field(min_length=1)])
+# Разбор JSON-массива без построения моделей: число посылок проверяется до валидации
+_raw_bulk_adapter = TypeAdapter(list[Any])
+
 
 async def _create_new_package(package_data: PackageCreate, session_id: str, db):
     """Создать новую посылку."""
@@ -24,50 +36,190 @@ async def _create_new_package(package_data: PackageCreate, session_id: str, db):
     session_repository = SessionRepository(db)
     package_service = PackageService(package_repository, session_repository)
     
-    return await package_service.create_package(package_data, session_id)
+    try:
+        return await package_service.create_package(package_data, session_id)
+    except UnknownPackageTypeError as e:
+        raise RequestValidationError(_unknown_type_errors(e))
 
 
-async def _get_user_packages(session_id: str, db, page: int, size: int, type_id: Optional[int], has_shipping_cost: Optional[bool]):
-    """Получить посылки пользователя с пагинацией."""
+async def _create_packages_bulk(request: Request, session_id: str, db):
+    """Создать несколько посылок из тела запроса (JSON-массив или NDJSON)."""
+    packages_data = await _read_bulk_packages(request)
+    
     package_repository = PackageRepository(db)
     session_repository = SessionRepository(db)
     package_service = PackageService(package_repository, session_repository)
     
-    packages, total, current_page, pages = await package_service.get_packages(
-        session_id, page, size, type_id, has_shipping_cost
-    )
-    
-    from src.schemas.responses import PaginatedPackagesResponse, PackageResponse
-    
-    package_responses = [
-        PackageResponse(
-            id=pkg.id,
-            name=pkg.name,
-            weight=pkg.weight,
-            type_id=pkg.type_id,
-            price=pkg.price,
-            shipping_cost=pkg.shipping_cost,
-            session_id=session_id
+    try:
+        return await package_service.create_packages_bulk(packages_data, session_id)
+    except UnknownPackageTypeError as e:
+        raise RequestValidationError(_unknown_type_errors(e))
+
+
+async def _read_bulk_packages(request: Request) -> list[PackageCreate]:
+    """
+    Прочитать и провалидировать посылки из тела запроса.
+    
+    Для application/x-ndjson тело читается потоком построчно,
+    иначе ожидается JSON-массив. Размер тела и число посылок
+    проверяются до валидации посылок.
+    
+    Raises:
+        RequestValidationError: Если хотя бы одна посылка некорректна
+        HTTPException: Если посылок больше BULK_MAX_ITEMS или тело слишком большое
+    """
+    max_body_bytes = BULK_MAX_ITEMS * BULK_MAX_ITEM_BYTES
+    _check_content_length(request, max_body_bytes)
+    
+    content_type = request.headers.get("content-type", "")
+    if content_type.split(";")[0].strip() == NDJSON_CONTENT_TYPE:
+        return await _read_ndjson_packages(request, max_body_bytes)
+    
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        _check_body_size(len(body), max_body_bytes)
+    
+    try:
+        raw_packages = _raw_bulk_adapter.validate_json(bytes(body))
+        _check_bulk_size(len(raw_packages))
+        return _bulk_adapter.validate_python(raw_packages)
+    except ValidationError as e:
+        raise RequestValidationError(_with_body_loc(e.errors(include_url=False)))
+
+
+async def _read_ndjson_packages(request: Request, max_body_bytes: int) -> list[PackageCreate]:
+    """Прочитать посылки из NDJSON-потока, по одной на строку."""
+    packages_data = []
+    errors = []
+    buffer = b""
+    received = 0
+    
+    def parse_line(line: bytes):
+        if not line.strip():
+            return
+        index = len(packages_data) + len(errors)
+        _check_bulk_size(index + 1)
+        try:
+            packages_data.append(PackageCreate.model_validate_json(line))
+        except ValidationError as e:
+            errors.extend(_with_body_loc(e.errors(include_url=False), index))
+    
+    async for chunk in request.stream():
+        received += len(chunk)
+        _check_body_size(received, max_body_bytes)
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            parse_line(line)
+    parse_line(buffer)
+    
+    if errors:
+        raise RequestValidationError(errors)
+    if not packages_data:
+        raise RequestValidationError([{
+            "type": "too_short",
+            "loc": ("body",),
+            "msg": "Передайте хотя бы одну посылку",
+            "input": None,
+        }])
+    return packages_data
+
+
+def _check_content_length(request: Request, max_body_bytes: int):
+    """Отклонить запрос по заголовку Content-Length, не читая тело."""
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit():
+        _check_body_size(int(content_length), max_body_bytes)
+
+
+def _check_body_size(size: int, max_body_bytes: int):
+    """Проверить, что тело запроса не больше max_body_bytes."""
+    if size > max_body_bytes:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Слишком большое тело запроса: максимум {max_body_bytes} байт"
         )
-        for pkg in packages
+
+
+def _check_bulk_size(count: int):
+    """Проверить, что посылок в запросе не больше BULK_MAX_ITEMS."""
+    if count > BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Слишком много посылок в запросе: максимум {BULK_MAX_ITEMS}"
+        )
+
+
+def _unknown_type_errors(error: UnknownPackageTypeError) -> list[dict]:
+    """Ошибки валидации в формате FastAPI для неизвестных типов посылок."""
+    return [
+        {
+            "type": "unknown_package_type",
+            "loc": ("body", *loc),
+            "msg": f"Тип посылки {type_id} не существует",
+            "input": type_id,
+        }
+        for loc, type_id in error.invalid
     ]
+
+
+def _with_body_loc(errors: list[dict], *prefix) -> list[dict]:
+    """Добавить к пути ошибок валидации префикс тела запроса."""
+    return [{**error, "loc": ("body", *prefix, *error["loc"])} for error in errors]
+
+
+async def _get_user_packages(session_id: str, db, page: int, size: int, type_id: Optional[int], has_shipping_cost: Optional[bool], cursor: Optional[str] = None, include_total: bool = True) -> ORJSONResponse:
+    """Получить посылки пользователя с пагинацией."""
+    package_repository = PackageRepository(db)
+    session_repository = SessionRepository(db)
+    package_service = PackageService(package_repository, session_repository)
+    
+    try:
+        packages, total, current_page, pages, next_cursor = await package_service.get_packages(
+            session_id, page, size, type_id, has_shipping_cost, cursor, include_total
+        )
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Некорректный курсор пагинации")
     
-    return PaginatedPackagesResponse(
-        packages=package_responses,
-        total=total,
-        page=current_page,
-        size=size,
-        pages=pages
-    )
+    # Ответ сериализуется напрямую через orjson: словари посылок уже
+    # в формате PaginatedPackagesResponse, повторная валидация не нужна
+    return ORJSONResponse({
+        "packages": packages,
+        "total": total,
+        "page": current_page,
+        "size": size,
+        "pages": pages,
+        "next_cursor": next_cursor,
+    })
 
 
-async def _get_all_packages_types(db):
-    """Получить все типы посылок."""
+async def _get_all_packages_types(request: Request, db) -> Response:
+    """
+    Получить все типы посылок.
+    
+    Ответ содержит ETag: если он совпадает с If-None-Match,
+    возвращается 304 без тела.
+    """
     package_repository = PackageRepository(db)
     session_repository = SessionRepository(db)
     package_service = PackageService(package_repository, session_repository)
     
-    return await package_service.get_package_types()
+    types = await package_service.get_package_types()
+    headers = {"ETag": types.etag, "Cache-Control": f"public, max-age={PACKAGE_TYPES_MAX_AGE}"}
+    
+    if _etag_matches(request.headers.get("if-none-match"), types.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=types.body, media_type="application/json", headers=headers)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Проверить заголовок If-None-Match (слабое сравнение, RFC 9110)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
 
 
 async def _get_package_info(package_id: str, session_id: str, db):
@@ -7,13 +7,22 @@ from typing import Optional
 
 from pydantic import BaseModel
 
+from src.models.db import ShippingStatus
+
 from .base import TunedModel
 
 
 class TaskResponse(BaseModel):
     """Схема ответа задачи Celery."""
-    task_id: str
+    task_id: Optional[str] = None
+    status: str
+
+
+class BulkTaskResponse(BaseModel):
+    """Схема ответа массового создания посылок."""
+    task_id: Optional[str] = None
     status: str
+    package_ids: list[uuid.UUID]
 
 
 class PackageGetTypes(TunedModel):
@@ -28,18 +37,21 @@ class PackageResponse(TunedModel):
     name: str
     weight: float
     type_id: int
+    type_name: Optional[str] = None
     price: float
     shipping_cost: Optional[str] = None
+    shipping_status: ShippingStatus = ShippingStatus.PENDING
     session_id: uuid.UUID
 
 
 class PaginatedPackagesResponse(BaseModel):
     """Схема пагинированного ответа с посылками."""
     packages: list[PackageResponse]
-    total: int
+    total: Optional[int] = None
     page: int
     size: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 class SessionResponse(TunedModel):
@@ -55,8 +67,10 @@ class PackageInfo(TunedModel):
     name: str
     weight: float
     type_id: int
+    type_name: Optional[str] = None
     price: float
     shipping_cost: Optional[str] = None
+    shipping_status: ShippingStatus = ShippingStatus.PENDING
 
 
 class GetPackageID(TunedModel):
@@ -0,0 +1,150 @@
+"""
+Реестр типов посылок.
+
+Таблица package_types заполняется один раз (init_package_types) и практически
+не меняется, поэтому типы загружаются в память процесса при запуске и
+отдаются без обращения к БД. После изменения таблицы нужно вызвать
+notify_package_types_changed(): реестры всех экземпляров приложения
+будут сброшены через INVALIDATION_CHANNEL.
+"""
+
+import asyncio
+import hashlib
+import json
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Optional
+
+from src.config.settings import CACHE_KEY_PREFIX
+from src.db.session import async_session
+from src.repositories.packages import PackageRepository
+from src.utils.logging import get_logger
+from src.utils.redis.invalidation import (
+    publish_invalidation,
+    register_invalidation_handler,
+)
+
+logger = get_logger(__name__)
+
+# Ключ сообщения об изменении таблицы package_types в INVALIDATION_CHANNEL
+PACKAGE_TYPES_KEY = f"{CACHE_KEY_PREFIX}:package_types"
+
+
+class UnknownPackageTypeError(ValueError):
+    """Тип посылки не найден в реестре."""
+    
+    def __init__(self, invalid: list[tuple[tuple, int]]):
+        """
+        Args:
+            invalid: Пары (путь к полю type_id в теле запроса, значение type_id)
+        """
+        type_ids = ", ".join(str(type_id) for _, type_id in invalid)
+        super().__init__(f"Неизвестный тип посылки: {type_ids}")
+        self.invalid = invalid
+
+
+class PackageTypes:
+    """
+    Неизменяемый снимок типов посылок.
+    
+    Хранит словарь id -> название, готовое JSON-тело ответа
+    GET /packages/types и его ETag.
+    """
+    
+    __slots__ = ("names", "body", "etag")
+    
+    def __init__(self, names: Mapping[int, str]):
+        self.names: Mapping[int, str] = MappingProxyType(dict(sorted(names.items())))
+        self.body = json.dumps(self.as_list(), ensure_ascii=False).encode()
+        self.etag = f'"{hashlib.sha256(self.body).hexdigest()[:32]}"'
+    
+    def as_list(self) -> list[dict]:
+        """Типы посылок в формате ответа API."""
+        return [{"id": type_id, "name": name} for type_id, name in self.names.items()]
+    
+    def name(self, type_id: int) -> Optional[str]:
+        """Название типа или None для неизвестного типа."""
+        return self.names.get(type_id)
+    
+    def validate(self, type_ids: list[tuple[tuple, int]]):
+        """
+        Проверить, что все типы посылок существуют.
+        
+        Args:
+            type_ids: Пары (путь к полю type_id в теле запроса, значение type_id)
+        
+        Raises:
+            UnknownPackageTypeError: Если хотя бы одного типа нет
+        """
+        invalid = [(loc, type_id) for loc, type_id in type_ids if type_id not in self.names]
+        if invalid:
+            raise UnknownPackageTypeError(invalid)
+    
+    def __contains__(self, type_id: int) -> bool:
+        return type_id in self.names
+    
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+class PackageTypeRegistry:
+    """
+    Типы посылок в памяти процесса.
+    
+    Загружаются при запуске приложения (load) или при первом обращении
+    (get). После сброса через invalidate() следующее обращение загрузит
+    типы заново.
+    """
+    
+    def __init__(self):
+        self._types: Optional[PackageTypes] = None
+        # Создается при первой загрузке: на Python 3.9 Lock привязывается
+        # к event loop при создании, а реестр создается при импорте
+        self._lock: Optional[asyncio.Lock] = None
+    
+    @property
+    def current(self) -> Optional[PackageTypes]:
+        """Загруженные типы или None, если реестр еще не загружен."""
+        return self._types
+    
+    async def load(self, package_repository: PackageRepository) -> PackageTypes:
+        """Загрузить типы посылок из БД."""
+        types = await package_repository.get_all_types()
+        self._types = PackageTypes({t.id: t.name for t in types})
+        logger.info("Загружено типов посылок: %s", len(self._types))
+        return self._types
+    
+    async def get(self, package_repository: PackageRepository) -> PackageTypes:
+        """Получить типы посылок, загрузив их при первом обращении."""
+        types = self._types
+        if types is not None:
+            return types
+        
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._types is None:
+                await self.load(package_repository)
+            return self._types
+    
+    def invalidate(self):
+        """Сбросить загруженные типы."""
+        self._types = None
+        logger.info("Реестр типов посылок сброшен")
+
+
+# Глобальный реестр типов посылок
+package_types = PackageTypeRegistry()
+register_invalidation_handler(PACKAGE_TYPES_KEY, package_types.invalidate)
+
+
+async def load_package_types() -> PackageTypes:
+    """Загрузить типы посылок в реестр (при запуске приложения)."""
+    async with async_session() as session:
+        return await package_types.load(PackageRepository(session))
+
+
+async def notify_package_types_changed():
+    """Сбросить реестры типов посылок во всех экземплярах приложения."""
+    package_types.invalidate()
+    await publish_invalidation(PACKAGE_TYPES_KEY)
@@ -4,18 +4,62 @@
 Содержит бизнес-логику, валидацию и обработку данных.
 """
 
-from typing import Optional
+import uuid
+from collections.abc import Awaitable, Callable
+from typing import Optional, TypeVar
 
+from sqlalchemy import Insert
+from sqlalchemy.exc import IntegrityError
+
+from src.config.settings import SHIPPING_BATCH_ENABLED, SHIPPING_BATCH_SIZE, SHIPPING_INLINE_ENABLED
+from src.models.db import Package, ShippingStatus
 from src.repositories.packages import PackageRepository
 from src.repositories.sessions import SessionRepository
 from src.schemas.requests import PackageCreate
-from src.schemas.responses import PackageInfo, TaskResponse
-from src.services.sessions import check_session
-from src.utils.celery.tasks import calculate_and_save
+from src.schemas.responses import BulkTaskResponse, PackageInfo, TaskResponse
+from src.services.package_types import PackageTypes, package_types
+from src.services.sessions import known_sessions
+from src.services.shipping import (
+    PENDING_PACKAGES_KEY,
+    calculate_shipping_cost,
+    format_shipping_cost,
+    get_cached_usd_rub_rate,
+)
+from src.utils.celery.tasks import calculate_and_save, calculate_and_save_batch, drain_pending_packages
 from src.utils.logging import get_logger
+from src.utils.pagination import decode_cursor, encode_cursor
+from src.utils.redis.redis_cache import cache
 
 logger = get_logger(__name__)
 
+T = TypeVar("T")
+
+# Внешний ключ packages.session_id (имя по умолчанию PostgreSQL)
+SESSION_FK_CONSTRAINT = "packages_session_id_fkey"
+FOREIGN_KEY_VIOLATION = "23503"
+
+
+def _is_missing_session_error(error: IntegrityError) -> bool:
+    """Нарушен ли внешний ключ packages.session_id (сессии нет в БД)."""
+    orig = error.orig
+    # Исходное исключение драйвера: asyncpg (__cause__ адаптера SQLAlchemy) или psycopg2 (diag)
+    driver_error = getattr(orig, "__cause__", None)
+    sqlstate = (
+        getattr(orig, "sqlstate", None)
+        or getattr(orig, "pgcode", None)
+        or getattr(driver_error, "sqlstate", None)
+    )
+    if sqlstate != FOREIGN_KEY_VIOLATION:
+        return False
+    
+    constraint = (
+        getattr(driver_error, "constraint_name", None)
+        or getattr(getattr(orig, "diag", None), "constraint_name", None)
+    )
+    if constraint is not None:
+        return constraint == SESSION_FK_CONSTRAINT
+    return SESSION_FK_CONSTRAINT in str(orig)
+
 
 class PackageService:
     """Сервис для работы с посылками."""
@@ -25,51 +69,195 @@ class PackageService:
         self.session_repository = session_repository
     
     async def create_package(self, package_data: PackageCreate, session_id: str) -> TaskResponse:
-        """Создать новую посылку."""
-        # Проверяем/создаем сессию
-        session = await check_session(session_id, self.package_repository, self.session_repository)
+        """
+        Создать новую посылку.
+        
+        Raises:
+            UnknownPackageTypeError: Если типа посылки нет
+        """
+        types = await package_types.get(self.package_repository)
+        types.validate([(("type_id",), package_data.type_id)])
         
-        # Создаем посылку
         package_dict = package_data.model_dump()
-        package_dict["session_id"] = session.id
+        package_dict["session_id"] = uuid.UUID(session_id)
+        
+        if SHIPPING_INLINE_ENABLED and await self._price_inline([package_dict]):
+            package = await self._insert_package(package_dict, session_id)
+            logger.info("Создана посылка %s, стоимость доставки рассчитана сразу", package.id)
+            return TaskResponse(status=ShippingStatus.CALCULATED.value)
         
-        package = await self.package_repository.create(package_dict)
+        package = await self._insert_package(package_dict, session_id)
+        
+        if SHIPPING_BATCH_ENABLED:
+            queued = await self._enqueue_for_batch(str(package.id))
+            if queued is not None:
+                return queued
         
         # Отправляем задачу в Celery для расчета стоимости
         task = calculate_and_save.delay(str(package.id))
         
-        logger.info(f"Создана посылка {package.id}, задача {task.id} отправлена в Celery")
+        logger.info("Создана посылка %s, задача %s отправлена в Celery", package.id, task.id)
         
         return TaskResponse(task_id=task.id, status="processing")
     
+    async def create_packages_bulk(self, packages_data: list[PackageCreate], session_id: str) -> BulkTaskResponse:
+        """
+        Создать несколько посылок одной транзакцией.
+        
+        Стоимость доставки всех посылок рассчитывается сразу (если включен
+        SHIPPING_INLINE_ENABLED и курс есть в кеше) или одной задачей Celery.
+        
+        Raises:
+            UnknownPackageTypeError: Если типа хотя бы одной посылки нет
+        """
+        types = await package_types.get(self.package_repository)
+        types.validate([((index, "type_id"), item.type_id) for index, item in enumerate(packages_data)])
+        
+        session_uuid = uuid.UUID(session_id)
+        rows = [dict(item.model_dump(), session_id=session_uuid) for item in packages_data]
+        priced = SHIPPING_INLINE_ENABLED and await self._price_inline(rows)
+        
+        package_ids = await self._insert_with_session(
+            session_id,
+            lambda session_upsert: self.package_repository.create_many(rows, session_upsert)
+        )
+        
+        if priced:
+            logger.info("Создано посылок: %s, стоимость доставки рассчитана сразу", len(package_ids))
+            return BulkTaskResponse(status=ShippingStatus.CALCULATED.value, package_ids=package_ids)
+        
+        task = calculate_and_save_batch.delay([str(package_id) for package_id in package_ids])
+        
+        logger.info("Создано посылок: %s, задача %s отправлена в Celery", len(package_ids), task.id)
+        
+        return BulkTaskResponse(task_id=task.id, status="processing", package_ids=package_ids)
+    
+    async def _price_inline(self, rows: list[dict]) -> bool:
+        """
+        Рассчитать стоимость доставки до вставки, если курс уже в кеше.
+        
+        Returns:
+            True, если стоимость записана в rows; False, если кеш курса пуст
+            и расчет нужно отдать Celery
+        """
+        usd_rate = await get_cached_usd_rub_rate()
+        if usd_rate is None:
+            return False
+        
+        for row in rows:
+            row["shipping_cost"] = calculate_shipping_cost(row["weight"], row["price"], usd_rate)
+            row["shipping_status"] = ShippingStatus.CALCULATED
+        return True
+    
+    async def _insert_package(self, package_dict: dict, session_id: str) -> Package:
+        """Вставить посылку, при необходимости создав сессию тем же запросом."""
+        return await self._insert_with_session(
+            session_id,
+            lambda session_upsert: self.package_repository.create(package_dict, session_upsert)
+        )
+    
+    async def _insert_with_session(
+        self,
+        session_id: str,
+        insert: Callable[[Optional[Insert]], Awaitable[T]]
+    ) -> T:
+        """
+        Выполнить вставку посылок, при необходимости создав сессию тем же запросом.
+        
+        insert получает INSERT сессии для CTE или None. Для известной сессии
+        выполняется обычный INSERT. Если сессии в БД все же нет (например,
+        БД пересоздана), вставка повторяется с созданием сессии. Прочие
+        нарушения ограничений пробрасываются как есть.
+        """
+        if await known_sessions.contains(session_id):
+            try:
+                return await insert(None)
+            except IntegrityError as e:
+                if not _is_missing_session_error(e):
+                    raise
+                await self.package_repository.session.rollback()
+                await known_sessions.discard(session_id)
+                logger.warning("Сессия %s из кеша не найдена в БД, создаем заново", session_id)
+        
+        session_upsert = self.session_repository.build_upsert(session_id)
+        result = await insert(session_upsert)
+        await known_sessions.add(session_id)
+        return result
+    
+    async def _enqueue_for_batch(self, package_id: str) -> Optional[TaskResponse]:
+        """
+        Поставить посылку в очередь пакетного расчета.
+        
+        Возвращает None, если Redis недоступен: тогда расчет выполняется
+        отдельной задачей, как без пакетного режима.
+        """
+        pending = await cache.push(PENDING_PACKAGES_KEY, package_id)
+        if pending is None:
+            return None
+        
+        task_id = None
+        if pending % SHIPPING_BATCH_SIZE == 0:
+            # Заполнилась очередная пачка — не ждем окна планировщика. Если
+            # очередь уже длиннее пачки (воркер отстал), задача ставится
+            # только на границе пачки, а не на каждую новую посылку. Границу
+            # можно пропустить, если параллельная выгрузка забрала посылки
+            # между RPUSH и проверкой; такие посылки заберет выгрузка по
+            # расписанию (SHIPPING_BATCH_WINDOW)
+            task_id = drain_pending_packages.delay().id
+        
+        logger.info("Создана посылка %s, поставлена в очередь пакетного расчета (%s)", package_id, pending)
+        
+        return TaskResponse(task_id=task_id, status="queued")
+    
     async def get_packages(
         self, 
         session_id: str, 
         page: int = 1, 
         size: int = 10,
         type_id: Optional[int] = None,
-        has_shipping_cost: Optional[bool] = None
-    ) -> tuple[list[PackageInfo], int, int, int]:
-        """Получить посылки с пагинацией и фильтрацией."""
+        has_shipping_cost: Optional[bool] = None,
+        cursor: Optional[str] = None,
+        include_total: bool = True
+    ) -> tuple[list[dict], Optional[int], int, Optional[int], Optional[str]]:
+        """
+        Получить посылки с пагинацией и фильтрацией.
+        
+        Посылки возвращаются словарями в формате PackageResponse, готовыми
+        к сериализации в JSON: строки БД преобразуются один раз, без
+        промежуточных Pydantic-моделей.
+        
+        Raises:
+            InvalidCursorError: Если передан поврежденный курсор
+        """
+        after = decode_cursor(cursor) if cursor else None
         packages, total = await self.package_repository.get_by_session_id(
-            session_id, page, size, type_id, has_shipping_cost
+            session_id, page, size, type_id, has_shipping_cost, after, include_total
         )
+        types = await package_types.get(self.package_repository)
         
-        package_infos = [
-            PackageInfo(
-                id=pkg.id,
-                name=pkg.name,
-                weight=pkg.weight,
-                type_id=pkg.type_id,
-                price=pkg.price,
-                shipping_cost=pkg.shipping_cost
-            )
+        package_rows = [
+            {
+                "id": pkg.id,
+                "name": pkg.name,
+                "weight": pkg.weight,
+                "type_id": pkg.type_id,
+                "type_name": types.name(pkg.type_id),
+                "price": pkg.price,
+                "shipping_cost": format_shipping_cost(pkg.shipping_cost, pkg.shipping_status),
+                "shipping_status": pkg.shipping_status,
+                "session_id": pkg.session_id,
+            }
             for pkg in packages
         ]
         
-        pages = (total + size - 1) // size
+        pages = (total + size - 1) // size if total is not None else None
         
-        return package_infos, total, page, pages
+        # Курсор следующей страницы есть, только если текущая заполнена
+        next_cursor = None
+        if len(packages) == size:
+            next_cursor = encode_cursor(packages[-1].created_at, packages[-1].id)
+        
+        return package_rows, total, page, pages, next_cursor
     
     async def get_package_by_id(self, package_id: str, session_id: str) -> Optional[PackageInfo]:
         """Получить посылку по ID."""
@@ -78,16 +266,19 @@ class PackageService:
         if not package or str(package.session_id) != session_id:
             return None
         
+        types = await package_types.get(self.package_repository)
+        
         return PackageInfo(
             id=package.id,
             name=package.name,
             weight=package.weight,
             type_id=package.type_id,
+            type_name=types.name(package.type_id),
             price=package.price,
-            shipping_cost=package.shipping_cost
+            shipping_cost=format_shipping_cost(package.shipping_cost, package.shipping_status),
+            shipping_status=package.shipping_status
         )
     
-    async def get_package_types(self) -> list:
-        """Получить все типы посылок."""
-        types = await self.package_repository.get_all_types()
-        return [{"id": t.id, "name": t.name} for t in types]
+    async def get_package_types(self) -> PackageTypes:
+        """Получить все типы посылок (из реестра в памяти процесса)."""
+        return await package_types.get(self.package_repository)
@@ -2,25 +2,161 @@
 Сервис для работы с сессиями пользователей.
 """
 
+import asyncio
+import uuid
+from datetime import datetime
+
+from src.config.settings import (
+    CACHE_KEY_PREFIX,
+    SESSION_ACTIVITY_FLUSH_INTERVAL,
+    SESSION_CACHE_REDIS,
+    SESSION_CACHE_SIZE,
+    SESSION_CACHE_TTL,
+    SESSION_MAX_AGE,
+)
+from src.db.session import async_session
 from src.repositories.sessions import SessionRepository
+from src.utils.local_cache import TTLCache
+from src.utils.logging import get_logger
+from src.utils.metrics import session_cache_requests
+from src.utils.redis.redis_cache import cache
+
+logger = get_logger(__name__)
 
 
-async def check_session(session_id: str, package_repository, session_repository: SessionRepository):
+class KnownSessions:
+    """
+    Кеш ID сессий, которые уже есть в БД.
+    
+    Сессия не удаляется в течение жизни cookie, поэтому известную сессию
+    можно не проверять в БД. Первый уровень — память процесса, второй
+    (опционально) — Redis, общий для всех экземпляров приложения.
     """
-    Проверяет существование сессии и создает новую при необходимости.
     
-    Args:
-        session_id: ID сессии
-        package_repository: Репозиторий посылок
-        session_repository: Репозиторий сессий
+    def __init__(self, maxsize: int, ttl: int, use_redis: bool = False):
+        self.use_redis = use_redis
+        self.redis_hits = 0
+        self._local = TTLCache(maxsize=maxsize, ttl=ttl)
+    
+    @staticmethod
+    def _redis_key(session_id: str) -> str:
+        return f"{CACHE_KEY_PREFIX}:session:{session_id}"
+    
+    async def contains(self, session_id: str) -> bool:
+        """Проверить, известна ли сессия."""
+        if self._local.get(session_id) is not None:
+            session_cache_requests.inc(result="hit")
+            return True
+        
+        if self.use_redis and await cache.exists(self._redis_key(session_id)):
+            self.redis_hits += 1
+            session_cache_requests.inc(result="redis_hit")
+            self._local.set(session_id, True)
+            return True
         
-    Returns:
-        Объект сессии
+        session_cache_requests.inc(result="miss")
+        return False
+    
+    async def add(self, session_id: str):
+        """Запомнить, что сессия есть в БД."""
+        self._local.set(session_id, True)
+        if self.use_redis:
+            await cache.set(self._redis_key(session_id), 1, SESSION_MAX_AGE)
+    
+    async def discard(self, session_id: str):
+        """Забыть сессию (например, если ее не оказалось в БД)."""
+        self._local.delete(session_id)
+        if self.use_redis:
+            await cache.delete(self._redis_key(session_id))
+    
+    def stats(self) -> dict:
+        """Статистика обращений к кешу."""
+        return {
+            "size": len(self._local),
+            "hits": self._local.hits,
+            "misses": self._local.misses,
+            "redis_hits": self.redis_hits,
+            "hit_rate": self._local.hit_rate,
+        }
+
+
+def _is_valid_session_id(session_id: str) -> bool:
+    """Проверить, что ID сессии — корректный UUID."""
+    try:
+        uuid.UUID(session_id)
+        return True
+    except ValueError:
+        return False
+
+
+class SessionActivityTracker:
     """
-    session = await session_repository.get_by_id(session_id)
+    Отложенная запись времени последней активности сессий.
     
-    if not session:
-        # Создаем новую сессию
-        session = await session_repository.create(session_id)
+    Запросы только отмечают сессию в памяти, а накопленные сессии
+    периодически обновляются в БД одним UPDATE. Точность last_activity
+    ограничена интервалом записи, чего достаточно для истечения сессий.
+    """
+    
+    def __init__(self):
+        self._touched: set[str] = set()
+    
+    def touch(self, session_id: str):
+        """Отметить активность сессии."""
+        self._touched.add(session_id)
+    
+    @property
+    def pending(self) -> int:
+        """Количество сессий, ожидающих записи."""
+        return len(self._touched)
     
-    return session
+    async def flush(self) -> int:
+        """
+        Записать накопленную активность в БД.
+        
+        Returns:
+            Количество обновленных сессий
+        """
+        if not self._touched:
+            return 0
+        
+        session_ids, self._touched = [
+            session_id for session_id in self._touched if _is_valid_session_id(session_id)
+        ], set()
+        if not session_ids:
+            return 0
+        
+        try:
+            async with async_session() as db:
+                updated = await SessionRepository(db).bulk_update_activity(session_ids, datetime.utcnow())
+                await db.commit()
+        except Exception:
+            # Вернем сессии в буфер, чтобы записать их при следующей попытке
+            self._touched.update(session_ids)
+            raise
+        
+        logger.debug("Активность сессий записана: %s из %s", updated, len(session_ids))
+        return updated
+    
+    async def run(self, interval: float = SESSION_ACTIVITY_FLUSH_INTERVAL):
+        """Периодически записывать активность до отмены задачи, затем записать остаток."""
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    await self.flush()
+                except Exception as e:
+                    logger.error("Ошибка записи активности сессий: %s", e)
+        finally:
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("Ошибка записи активности сессий при остановке: %s", e)
+
+
+# Глобальный кеш известных сессий
+known_sessions = KnownSessions(SESSION_CACHE_SIZE, SESSION_CACHE_TTL, SESSION_CACHE_REDIS)
+
+# Глобальный трекер активности сессий
+activity_tracker = SessionActivityTracker()
+
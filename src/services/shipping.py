@@ -4,41 +4,262 @@
 Содержит бизнес-логику расчета стоимости доставки с кешированием курсов валют.
 """
 
-from src.config.settings import CACHE_KEY_PREFIX, CACHE_TTL
+import asyncio
+import uuid
+from decimal import Decimal
+from typing import Optional
+
+from src.config.settings import (
+    CACHE_KEY_PREFIX,
+    CACHE_TTL,
+    RATE_LOCAL_TTL,
+    RATE_LOCK_TTL,
+    RATE_REFRESH_INTERVAL,
+    RATE_STALE_TTL,
+)
 from src.external.cbr_api import fetch_usd_rub_rate
+from src.models.db import ShippingStatus
+from src.utils.local_cache import TTLCache
 from src.utils.logging import get_logger
+from src.utils.redis.invalidation import publish_invalidation, register_invalidation_handler
 from src.utils.redis.redis_cache import cache
 
 logger = get_logger(__name__)
 
 CACHE_KEY = f"{CACHE_KEY_PREFIX}:usd_rub_rate"
+STALE_CACHE_KEY = f"{CACHE_KEY}:stale"
+REFRESH_LOCK_KEY = f"{CACHE_KEY}:lock"
+PENDING_PACKAGES_KEY = f"{CACHE_KEY_PREFIX}:pending_packages"
+
+# Значение shipping_cost в ответах API, пока стоимость не рассчитана
+NOT_CALCULATED = "Не рассчитано"
+
+# На сколько продлевается последний известный курс, если ЦБ недоступен
+STALE_RETRY_SECONDS = 60
+
+# За сколько секунд до истечения курса в кеше его обновляет фоновая задача
+# (меньше STALE_RETRY_SECONDS, чтобы продленный курс тоже обновлялся заранее)
+REFRESH_MARGIN_SECONDS = 15
+MIN_REFRESH_DELAY = 1.0
+
+# Первый уровень кеша: курс в памяти процесса.
+# Его TTL ограничивает устаревание в процессах, не слушающих INVALIDATION_CHANNEL.
+_local_rates = TTLCache(maxsize=1, ttl=RATE_LOCAL_TTL)
+register_invalidation_handler(CACHE_KEY, lambda: _local_rates.delete(CACHE_KEY))
+
+# Текущее обновление курса в этом процессе: параллельные промахи ждут его,
+# а не отправляют собственные запросы к ЦБ
+_inflight_refresh: Optional[asyncio.Task] = None
 
 
 async def get_usd_rub_rate() -> float:
     """
     Получить курс USD к RUB с кешированием.
     
+    Сначала проверяется кеш в памяти процесса, затем Redis,
+    и только потом API ЦБ РФ.
+    
     Returns:
         Курс USD к RUB
     """
+    global _inflight_refresh
+    
+    rate = _local_rates.get(CACHE_KEY)
+    if rate is not None:
+        return rate
+    
     # Пытаемся получить из кеша
     cached_rate = await cache.get(CACHE_KEY)
     if cached_rate is not None:
         logger.debug("Курс получен из кеша")
-        return float(cached_rate)
+        rate = float(cached_rate)
+        _local_rates.set(CACHE_KEY, rate)
+        return rate
     
-    # Если в кеше нет, получаем от API
-    logger.info("Получение курса от API ЦБ РФ")
-    rate = await fetch_usd_rub_rate()
+    # Если в кеше нет, получаем от API (один запрос на процесс)
+    loop = asyncio.get_running_loop()
+    if (
+        _inflight_refresh is None
+        or _inflight_refresh.done()
+        or _inflight_refresh.get_loop() is not loop
+    ):
+        _inflight_refresh = loop.create_task(_refresh_usd_rub_rate())
+    return await asyncio.shield(_inflight_refresh)
+
+
+async def get_cached_usd_rub_rate() -> Optional[float]:
+    """
+    Получить курс USD к RUB только из кеша, без запроса к API ЦБ РФ.
+    
+    Returns:
+        Курс USD к RUB или None, если его нет ни в памяти процесса, ни в Redis
+    """
+    rate = _local_rates.get(CACHE_KEY)
+    if rate is not None:
+        return rate
+    
+    cached_rate = await cache.get(CACHE_KEY)
+    if cached_rate is None:
+        return None
     
-    # Сохраняем в кеш
+    rate = float(cached_rate)
+    _local_rates.set(CACHE_KEY, rate)
+    return rate
+
+
+async def _store_usd_rub_rate(rate: float):
+    """Сохранить курс во все уровни кеша."""
     await cache.set(CACHE_KEY, rate, CACHE_TTL)
-    logger.info(f"Курс сохранен в кеш на {CACHE_TTL} секунд")
+    await cache.set(STALE_CACHE_KEY, rate, RATE_STALE_TTL)
+    _local_rates.set(CACHE_KEY, rate)
+    logger.info("Курс сохранен в кеш на %s секунд", CACHE_TTL)
+
+
+async def _get_stale_usd_rub_rate() -> Optional[float]:
+    """Получить последний известный курс (может быть устаревшим)."""
+    stale_rate = await cache.get(STALE_CACHE_KEY)
+    return float(stale_rate) if stale_rate is not None else None
+
+
+async def _wait_for_usd_rub_rate(timeout: float, interval: float = 0.1) -> Optional[float]:
+    """Дождаться, пока другой процесс сохранит курс в кеш."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while loop.time() < deadline:
+        await asyncio.sleep(interval)
+        cached_rate = await cache.get(CACHE_KEY)
+        if cached_rate is not None:
+            return float(cached_rate)
+    return None
+
+
+async def _refresh_usd_rub_rate() -> float:
+    """
+    Получить курс от API ЦБ РФ и сохранить в кеш.
+    
+    Между процессами запрос координируется блокировкой в Redis: запрос к ЦБ
+    выполняет только ее владелец, остальные получают последний известный
+    курс или ждут, пока владелец обновит кеш. Если ЦБ недоступен,
+    возвращается последний известный курс.
+    """
+    token = uuid.uuid4().hex
+    acquired = await cache.acquire_lock(REFRESH_LOCK_KEY, token, RATE_LOCK_TTL)
+    
+    if acquired is False:
+        stale_rate = await _get_stale_usd_rub_rate()
+        if stale_rate is not None:
+            logger.debug("Курс обновляет другой процесс, используется последний известный")
+            # Кладем в память ненадолго, чтобы до конца чужого обновления
+            # запросы этого процесса не ходили в Redis за блокировкой
+            _local_rates.set(CACHE_KEY, stale_rate, min(RATE_LOCAL_TTL, STALE_RETRY_SECONDS))
+            return stale_rate
+        
+        rate = await _wait_for_usd_rub_rate(RATE_LOCK_TTL)
+        if rate is not None:
+            _local_rates.set(CACHE_KEY, rate)
+            return rate
+        logger.warning("Не дождались обновления курса другим процессом")
+    
+    try:
+        return await _fetch_and_store_usd_rub_rate()
+    finally:
+        if acquired:
+            await cache.release_lock(REFRESH_LOCK_KEY, token)
+
+
+async def _fetch_and_store_usd_rub_rate() -> float:
+    """
+    Запросить курс у API ЦБ РФ и сохранить в кеш.
+    
+    Если ЦБ недоступен, последний известный курс возвращается и снова
+    кладется в кеш на STALE_RETRY_SECONDS, чтобы до следующей попытки
+    запросы не ждали таймаута внешнего API.
+    """
+    logger.info("Получение курса от API ЦБ РФ")
+    try:
+        rate = await fetch_usd_rub_rate()
+    except Exception:
+        stale_rate = await _get_stale_usd_rub_rate()
+        if stale_rate is None:
+            raise
+        logger.warning("API ЦБ РФ недоступен, используется последний известный курс")
+        await cache.set(CACHE_KEY, stale_rate, STALE_RETRY_SECONDS)
+        _local_rates.set(CACHE_KEY, stale_rate)
+        return stale_rate
     
+    await _store_usd_rub_rate(rate)
     return rate
 
 
-def calculate_shipping_cost(weight: float, price: float, usd_rate: float) -> str:
+async def refresh_usd_rub_rate(min_age: float = 0) -> Optional[float]:
+    """
+    Обновить курс в кеше заранее, не дожидаясь истечения CACHE_TTL.
+    
+    Args:
+        min_age: Не обновлять, если курс в кеше моложе min_age секунд
+            (его уже обновил другой экземпляр приложения)
+    
+    Returns:
+        Актуальный курс или None, если обновление не требовалось
+        или его выполняет другой процесс
+    """
+    remaining = await cache.ttl(CACHE_KEY)
+    if remaining is not None and remaining > CACHE_TTL - min_age:
+        logger.debug("Курс недавно обновлен другим процессом")
+        return None
+    
+    token = uuid.uuid4().hex
+    acquired = await cache.acquire_lock(REFRESH_LOCK_KEY, token, RATE_LOCK_TTL)
+    if acquired is False:
+        return None
+    
+    try:
+        return await _fetch_and_store_usd_rub_rate()
+    finally:
+        if acquired:
+            await cache.release_lock(REFRESH_LOCK_KEY, token)
+
+
+async def _next_refresh_delay(interval: float, fallback: float) -> float:
+    """
+    Через сколько секунд обновлять курс: незадолго до истечения ключа в Redis.
+    
+    Args:
+        interval: Наибольшая пауза между обновлениями
+        fallback: Пауза, если TTL ключа неизвестен (ключа нет или Redis недоступен)
+    """
+    remaining = await cache.ttl(CACHE_KEY)
+    if remaining is None:
+        return fallback
+    return max(MIN_REFRESH_DELAY, min(interval, remaining - REFRESH_MARGIN_SECONDS))
+
+
+async def run_rate_refresher(interval: float = RATE_REFRESH_INTERVAL, retry_delay: float = 60.0):
+    """
+    Обновлять курс до истечения его TTL в кеше.
+    
+    Пауза рассчитывается по оставшемуся TTL ключа, поэтому курс, сохраненный
+    другим экземпляром до запуска приложения, и последний известный курс,
+    продленный на STALE_RETRY_SECONDS при недоступности ЦБ, тоже обновляются
+    заранее. Работает до отмены задачи. Благодаря этому промахи кеша
+    на горячем пути не ждут ответа внешнего API.
+    """
+    # При запуске без курса в кеше обновляем сразу
+    delay = await _next_refresh_delay(interval, fallback=0)
+    while True:
+        if delay > 0:
+            await asyncio.sleep(delay)
+        try:
+            await refresh_usd_rub_rate(min_age=interval / 2)
+            delay = await _next_refresh_delay(interval, fallback=min(interval, retry_delay))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Ошибка фонового обновления курса: %s", e)
+            delay = min(interval, retry_delay)
+
+
+def calculate_shipping_cost(weight: float, price: float, usd_rate: float) -> float:
     """
     Рассчитать стоимость доставки.
     
@@ -50,19 +271,32 @@ def calculate_shipping_cost(weight: float, price: float, usd_rate: float) -> str
         usd_rate: Курс USD к RUB
         
     Returns:
-        Стоимость доставки в рублях (строка)
+        Стоимость доставки в рублях, округленная до копеек
     """
     base_cost = (weight * 0.5) + (price * 0.01)
-    shipping_cost = base_cost * usd_rate
+    return round(base_cost * usd_rate, 2)
+
+
+def format_shipping_cost(shipping_cost: Optional[Decimal], status: ShippingStatus) -> str:
+    """
+    Представить стоимость доставки для ответа API.
+    
+    Сохраняет прежний формат поля: строка с копейками
+    или "Не рассчитано", пока стоимость не рассчитана.
+    """
+    if status != ShippingStatus.CALCULATED or shipping_cost is None:
+        return NOT_CALCULATED
     return f"{shipping_cost:.2f}"
 
 
 async def clear_usd_rub_cache():
-    """Очистить кеш курса USD/RUB."""
-    try:
-        await cache.get_client()
-        client = await cache.get_client()
-        await client.delete(CACHE_KEY)
+    """
+    Очистить кеш курса USD/RUB.
+    
+    Локальные копии курса в других процессах сбрасываются
+    через сообщение в INVALIDATION_CHANNEL.
+    """
+    _local_rates.delete(CACHE_KEY)
+    if await cache.delete(CACHE_KEY):
+        await publish_invalidation(CACHE_KEY)
         logger.info("Кеш курса USD/RUB очищен")
-    except Exception as e:
-        logger.error(f"Ошибка очистки кеша: {e}")
@@ -1,6 +1,6 @@
 from celery import Celery
 
-from src.config.settings import RABBITMQ_URL
+from src.config.settings import RABBITMQ_URL, SHIPPING_BATCH_ENABLED, SHIPPING_BATCH_WINDOW
 
 celery_app = Celery(
     "package_tasks",
@@ -8,3 +8,15 @@ celery_app = Celery(
     backend="rpc://",
     include=["src.utils.celery.tasks"]
 )
+
+if SHIPPING_BATCH_ENABLED:
+    # Периодически забираем накопленные посылки, даже если пачка не заполнилась
+    celery_app.conf.beat_schedule = {
+        "drain-pending-packages": {
+            "task": "src.utils.celery.tasks.drain_pending_packages",
+            "schedule": float(SHIPPING_BATCH_WINDOW),
+        },
+    }
+
+# Регистрирует обработчики сигналов для метрик задач
+from src.utils.celery import metrics  # noqa: E402,F401
@@ -0,0 +1,235 @@
+"""
+Метрики задач Celery.
+
+В процессе-отправителе обработчики сигналов публикации замеряют, сколько
+занимает отправка задачи в брокер, и добавляют в заголовки сообщения
+время постановки в очередь. В процессе worker'а по этому времени
+считается ожидание задачи в очереди, а также длительность выполнения,
+исходы и повторы. Процессы worker'а периодически добавляют приращения
+своих метрик к общим счетчикам в Redis, откуда их отдает /metrics приложения.
+"""
+
+import json
+import threading
+import time
+from typing import Optional
+
+from celery.signals import (
+    after_task_publish,
+    before_task_publish,
+    task_postrun,
+    task_prerun,
+    task_retry,
+)
+
+from src.config.settings import (
+    CACHE_KEY_PREFIX,
+    WORKER_METRICS_PUSH_INTERVAL,
+    WORKER_METRICS_TTL,
+)
+from src.utils.logging import get_logger
+from src.utils.metrics import MetricsRegistry, record_enqueue
+
+logger = get_logger(__name__)
+
+# Заголовок сообщения с временем постановки задачи в очередь (Unix time)
+ENQUEUED_AT_HEADER = "enqueued_at"
+
+# Суммарные метрики всех процессов worker'ов и их описания (хеши Redis)
+WORKER_METRICS_KEY = f"{CACHE_KEY_PREFIX}:metrics:worker"
+WORKER_METRICS_META_KEY = f"{WORKER_METRICS_KEY}:meta"
+
+# Метрики процесса worker'а (отдельно от метрик HTTP-запросов приложения)
+worker_registry = MetricsRegistry()
+
+task_queue_wait = worker_registry.histogram(
+    "celery_task_queue_wait_seconds",
+    "Время от постановки задачи в очередь до начала выполнения",
+    ("task",),
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+task_run_duration = worker_registry.histogram(
+    "celery_task_run_seconds", "Длительность выполнения задачи", ("task",)
+)
+tasks_total = worker_registry.counter(
+    "celery_tasks_total", "Выполненные задачи по итоговому состоянию", ("task", "state")
+)
+task_retries = worker_registry.counter(
+    "celery_task_retries_total", "Повторы задач", ("task",)
+)
+
+# Время начала публикации и выполнения по ID задачи
+_publish_started: dict[str, float] = {}
+_task_started: dict[str, float] = {}
+_lock = threading.Lock()
+_last_push = float("-inf")
+# Значения, уже добавленные к общим счетчикам в Redis
+_pushed: dict[str, float] = {}
+_push_lock = threading.Lock()
+
+
+@before_task_publish.connect
+def _on_before_task_publish(sender=None, headers=None, **kwargs):
+    if headers is None:
+        return
+    headers[ENQUEUED_AT_HEADER] = time.time()
+    task_id = headers.get("id")
+    if task_id:
+        with _lock:
+            _publish_started[task_id] = time.perf_counter()
+
+
+@after_task_publish.connect
+def _on_after_task_publish(sender=None, headers=None, **kwargs):
+    task_id = (headers or {}).get("id")
+    with _lock:
+        started = _publish_started.pop(task_id, None)
+    if started is not None:
+        record_enqueue(sender or "unknown", time.perf_counter() - started)
+
+
+def _enqueued_at(request) -> Optional[float]:
+    """Время постановки задачи в очередь из заголовков сообщения."""
+    value = getattr(request, ENQUEUED_AT_HEADER, None)
+    if value is None:
+        # В некоторых версиях Celery пользовательские заголовки лежат отдельно
+        value = (getattr(request, "headers", None) or {}).get(ENQUEUED_AT_HEADER)
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+@task_prerun.connect
+def _on_task_prerun(task_id=None, task=None, **kwargs):
+    with _lock:
+        _task_started[task_id] = time.perf_counter()
+
+    # Время на разных машинах может расходиться: ожидание считаем приблизительным
+    enqueued_at = _enqueued_at(task.request)
+    if enqueued_at is not None:
+        task_queue_wait.observe(max(0.0, time.time() - enqueued_at), task=task.name)
+
+
+@task_postrun.connect
+def _on_task_postrun(task_id=None, task=None, state=None, **kwargs):
+    with _lock:
+        started = _task_started.pop(task_id, None)
+    if started is not None:
+        task_run_duration.observe(time.perf_counter() - started, task=task.name)
+    tasks_total.inc(task=task.name, state=state or "UNKNOWN")
+    push_worker_metrics()
+
+
+@task_retry.connect
+def _on_task_retry(sender=None, **kwargs):
+    task_retries.inc(task=getattr(sender, "name", "unknown"))
+
+
+def _series(snapshot: dict) -> dict[str, float]:
+    """
+    Разложить снимок реестра на отдельные значения.
+
+    Поле — JSON [имя метрики, значения меток, номер бакета | "sum" | null].
+    """
+    series = {}
+    for name, data in snapshot.items():
+        for labels, value in data["values"]:
+            if data["type"] == "histogram":
+                counts, total = value
+                for index, count in enumerate(counts):
+                    series[json.dumps([name, labels, index])] = count
+                series[json.dumps([name, labels, "sum"])] = total
+            else:
+                series[json.dumps([name, labels, None])] = value
+    return series
+
+
+def _describe(snapshot: dict) -> dict[str, str]:
+    """Описания метрик снимка (без значений) для хеша WORKER_METRICS_META_KEY."""
+    return {
+        name: json.dumps({key: value for key, value in data.items() if key != "values"})
+        for name, data in snapshot.items()
+    }
+
+
+def push_worker_metrics(force: bool = False, interval: float = WORKER_METRICS_PUSH_INTERVAL) -> bool:
+    """
+    Добавить приращения метрик процесса worker'а к общим счетчикам в Redis.
+
+    Процессы складывают в один хеш только изменения с предыдущей отправки
+    (HINCRBYFLOAT), поэтому суммарные значения не уменьшаются, когда процесс
+    перезапускается или завершается. Без force отправляет не чаще раза
+    в interval секунд.
+
+    Returns:
+        True, если метрики отправлены
+    """
+    # Отправку из нескольких потоков выполняет один: иначе приращения задвоятся
+    if not _push_lock.acquire(blocking=force):
+        return False
+    try:
+        return _push_worker_metrics(force, interval)
+    finally:
+        _push_lock.release()
+
+
+def _push_worker_metrics(force: bool, interval: float) -> bool:
+    global _last_push
+
+    now = time.monotonic()
+    if not force and now - _last_push < interval:
+        return False
+    _last_push = now
+
+    # Импорт здесь: модуль ресурсов worker'а не нужен процессу приложения
+    from src.utils.celery.worker import get_redis
+
+    snapshot = worker_registry.snapshot()
+    series = _series(snapshot)
+    deltas = {
+        field: value - _pushed.get(field, 0)
+        for field, value in series.items()
+        if value != _pushed.get(field, 0)
+    }
+    try:
+        pipe = get_redis().pipeline()
+        for field, delta in deltas.items():
+            pipe.hincrbyfloat(WORKER_METRICS_KEY, field, delta)
+        if snapshot:
+            pipe.hset(WORKER_METRICS_META_KEY, mapping=_describe(snapshot))
+        pipe.expire(WORKER_METRICS_KEY, WORKER_METRICS_TTL)
+        pipe.expire(WORKER_METRICS_META_KEY, WORKER_METRICS_TTL)
+        pipe.execute()
+    except Exception as e:
+        # Неотправленные приращения уйдут со следующей отправкой
+        logger.error("Ошибка отправки метрик worker'а в Redis: %s", e)
+        return False
+    _pushed.update(series)
+    return True
+
+
+def worker_metrics_snapshot(meta: dict[str, str], values: dict[str, str]) -> dict:
+    """
+    Собрать снимок для MetricsRegistry.merge из хешей Redis.
+
+    Args:
+        meta: Поля WORKER_METRICS_META_KEY (описания метрик)
+        values: Поля WORKER_METRICS_KEY (суммарные значения)
+    """
+    snapshot = {name: dict(json.loads(data), values=[]) for name, data in meta.items()}
+    series: dict[tuple[str, tuple], dict] = {}
+    for field, value in values.items():
+        name, labels, part = json.loads(field)
+        if name not in snapshot:
+            continue
+        series.setdefault((name, tuple(labels)), {})[part] = float(value)
+
+    for (name, labels), parts in series.items():
+        data = snapshot[name]
+        if data["type"] == "histogram":
+            counts = [int(parts.get(index, 0)) for index in range(len(data["buckets"]) + 1)]
+            data["values"].append([list(labels), [counts, parts.get("sum", 0.0)]])
+        else:
+            data["values"].append([list(labels), parts.get(None, 0.0)])
+    return snapshot
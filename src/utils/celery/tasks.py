@@ -1,26 +1,35 @@
-import asyncio
-
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-
 import sys
+import uuid
 from pathlib import Path
 
 # Add the project root to Python path
 project_root = Path(__file__).parent.parent.parent.parent
 sys.path.insert(0, str(project_root))
 
-from src.config.settings import CELERY_DATABASE_URL
-from src.models.db import Package
-from src.services.shipping import calculate_shipping_cost
+from sqlalchemy import Numeric, column, select, update, values
+from sqlalchemy.dialects.postgresql import UUID
+
+from src.config.settings import SHIPPING_BATCH_SIZE
+from src.models.db import Package, ShippingStatus
+from src.services.shipping import (
+    PENDING_PACKAGES_KEY,
+    calculate_shipping_cost,
+    get_usd_rub_rate,
+)
 from src.utils.logging import get_logger
 
 from .celery_app import celery_app
+from .worker import get_redis, get_session_factory, run_async
 
 # Получаем логгер для модуля
 logger = get_logger(__name__)
 
 
+def _get_usd_rub_rate_sync() -> float:
+    """Получить курс USD/RUB из синхронного кода задачи."""
+    return run_async(get_usd_rub_rate())
+
+
 @celery_app.task
 def calculate_and_save(package_id: str):
     """
@@ -30,27 +39,20 @@ def calculate_and_save(package_id: str):
         package_id: ID посылки
     """
     try:
-        logger.info(f"Начинаю расчет стоимости для посылки {package_id}")
+        logger.info("Начинаю расчет стоимости для посылки %s", package_id)
         
-        # Создаем синхронное соединение с БД для Celery
-        engine = create_engine(CELERY_DATABASE_URL)
-        Session = sessionmaker(bind=engine)
+        # Используем пул соединений процесса worker'а
+        Session = get_session_factory()
         
         with Session() as session:
             # Получаем посылку
             package = session.query(Package).filter(Package.id == package_id).first()
             if not package:
-                logger.error(f"Посылка {package_id} не найдена")
+                logger.error("Посылка %s не найдена", package_id)
                 return
             
             # Получаем курс USD/RUB
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                from src.services.shipping import get_usd_rub_rate
-                usd_rate = loop.run_until_complete(get_usd_rub_rate())
-            finally:
-                loop.close()
+            usd_rate = _get_usd_rub_rate_sync()
             
             # Рассчитываем стоимость доставки
             shipping_cost = calculate_shipping_cost(
@@ -61,10 +63,118 @@ def calculate_and_save(package_id: str):
             
             # Обновляем посылку
             package.shipping_cost = shipping_cost
+            package.shipping_status = ShippingStatus.CALCULATED
             session.commit()
             
-            logger.info(f"Стоимость доставки для посылки {package_id}: {shipping_cost}")
+            logger.info("Стоимость доставки для посылки %s: %s", package_id, shipping_cost)
             
     except Exception as e:
-        logger.error(f"Ошибка расчета стоимости для посылки {package_id}: {e}")
+        logger.error("Ошибка расчета стоимости для посылки %s: %s", package_id, e)
+        _mark_failed([package_id])
+        raise
+
+
+def _mark_failed(package_ids: list[str]):
+    """Отметить расчет стоимости посылок как неудачный."""
+    try:
+        Session = get_session_factory()
+        with Session() as session:
+            session.execute(
+                update(Package)
+                .where(Package.id.in_([uuid.UUID(package_id) for package_id in package_ids]))
+                .where(Package.shipping_status == ShippingStatus.PENDING)
+                .values(shipping_status=ShippingStatus.FAILED)
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+    except Exception as e:
+        logger.error("Не удалось отметить ошибку расчета для %s посылок: %s", len(package_ids), e)
+
+
+def _calculate_batch(package_ids: list[str]) -> int:
+    """
+    Рассчитать стоимость доставки для группы посылок.
+
+    Посылки загружаются одним запросом, курс запрашивается один раз,
+    а стоимости записываются одним UPDATE ... FROM (VALUES ...).
+
+    Returns:
+        Количество обновленных посылок
+    """
+    ids = [uuid.UUID(package_id) for package_id in package_ids]
+    Session = get_session_factory()
+
+    with Session() as session:
+        rows = session.execute(
+            select(Package.id, Package.weight, Package.price).where(Package.id.in_(ids))
+        ).all()
+        if not rows:
+            logger.warning("Посылки для пакетного расчета не найдены: %s шт.", len(ids))
+            return 0
+
+        usd_rate = _get_usd_rub_rate_sync()
+
+        costs = values(
+            column("id", UUID(as_uuid=True)),
+            column("shipping_cost", Numeric(12, 2)),
+            name="costs",
+        ).data([
+            (row.id, calculate_shipping_cost(row.weight, row.price, usd_rate))
+            for row in rows
+        ])
+        session.execute(
+            update(Package)
+            .where(Package.id == costs.c.id)
+            .values(shipping_cost=costs.c.shipping_cost, shipping_status=ShippingStatus.CALCULATED)
+            .execution_options(synchronize_session=False)
+        )
+        session.commit()
+
+    return len(rows)
+
+
+@celery_app.task
+def calculate_and_save_batch(package_ids: list[str]):
+    """
+    Рассчитать стоимость доставки для списка посылок.
+
+    Args:
+        package_ids: ID посылок
+    """
+    try:
+        updated = _calculate_batch(package_ids)
+        logger.info("Пакетный расчет: обновлено %s из %s посылок", updated, len(package_ids))
+    except Exception as e:
+        logger.error("Ошибка пакетного расчета стоимости (%s посылок): %s", len(package_ids), e)
+        _mark_failed(package_ids)
         raise
+
+
+@celery_app.task
+def drain_pending_packages():
+    """
+    Забрать накопленные ID посылок из Redis и рассчитать их группами.
+
+    Запускается по расписанию (окно SHIPPING_BATCH_WINDOW) и при
+    накоплении SHIPPING_BATCH_SIZE посылок в очереди.
+    """
+    client = get_redis()
+    total = 0
+
+    while True:
+        package_ids = client.lpop(PENDING_PACKAGES_KEY, SHIPPING_BATCH_SIZE)
+        if not package_ids:
+            break
+        try:
+            total += _calculate_batch(package_ids)
+        except Exception as e:
+            # Возвращаем ID в очередь, чтобы не потерять посылки
+            client.rpush(PENDING_PACKAGES_KEY, *package_ids)
+            logger.error("Ошибка пакетного расчета, %s посылок возвращены в очередь: %s", len(package_ids), e)
+            raise
+        if len(package_ids) < SHIPPING_BATCH_SIZE:
+            break
+
+    if total:
+        logger.info("Из очереди рассчитано посылок: %s", total)
+    return total
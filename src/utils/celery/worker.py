@@ -0,0 +1,167 @@
+"""
+Ресурсы процесса Celery worker.
+
+Движок БД, пул соединений, клиенты Redis и event loop для асинхронных
+вызовов создаются один раз на процесс worker'а (после fork в prefork-режиме)
+и освобождаются при его завершении.
+"""
+
+import asyncio
+import threading
+from collections.abc import Coroutine
+from typing import Any, Optional
+
+from celery.signals import worker_process_init, worker_process_shutdown
+from redis import Redis
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+from src.config.settings import (
+    CELERY_DATABASE_URL,
+    CELERY_DB_MAX_OVERFLOW,
+    CELERY_DB_POOL_RECYCLE,
+    CELERY_DB_POOL_SIZE,
+    CELERY_DB_POOL_TIMEOUT,
+    REDIS_URL,
+)
+from src.external.cbr_api import cbr_client
+from src.utils.celery.metrics import push_worker_metrics
+from src.utils.logging import get_logger
+from src.utils.redis.redis_cache import cache
+
+logger = get_logger(__name__)
+
+_engine: Optional[Engine] = None
+_session_factory: Optional[sessionmaker] = None
+_redis: Optional[Redis] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def init_db_engine() -> sessionmaker:
+    """Создать движок БД и фабрику сессий для текущего процесса."""
+    global _engine, _session_factory
+
+    if _engine is not None:
+        # Движок унаследован от родительского процесса при fork:
+        # соединения родителя не закрываем, а просто забываем о них
+        _engine.dispose(close=False)
+
+    _engine = create_engine(
+        CELERY_DATABASE_URL,
+        pool_size=CELERY_DB_POOL_SIZE,
+        max_overflow=CELERY_DB_MAX_OVERFLOW,
+        pool_recycle=CELERY_DB_POOL_RECYCLE,
+        pool_timeout=CELERY_DB_POOL_TIMEOUT,
+        pool_pre_ping=True,
+    )
+    _session_factory = sessionmaker(bind=_engine)
+    logger.info(
+        "Пул соединений worker'а создан: size=%s, max_overflow=%s",
+        CELERY_DB_POOL_SIZE, CELERY_DB_MAX_OVERFLOW
+    )
+    return _session_factory
+
+
+def get_session_factory() -> sessionmaker:
+    """
+    Получить фабрику сессий процесса.
+
+    Если worker запущен без prefork (solo/threads) или задача выполняется
+    синхронно, движок создается при первом обращении. В пуле threads
+    асинхронные вызовы задач выполняются по очереди (см. run_async).
+    """
+    if _session_factory is None:
+        return init_db_engine()
+    return _session_factory
+
+
+def dispose_db_engine():
+    """Закрыть все соединения пула текущего процесса."""
+    global _engine, _session_factory
+
+    if _engine is not None:
+        _engine.dispose()
+        _engine = None
+        _session_factory = None
+        logger.info("Пул соединений worker'а закрыт")
+
+
+def get_redis() -> Redis:
+    """Получить синхронный клиент Redis процесса."""
+    global _redis
+
+    if _redis is None:
+        _redis = Redis.from_url(REDIS_URL, encoding="utf-8", decode_responses=True)
+    return _redis
+
+
+def close_redis():
+    """Закрыть клиент Redis текущего процесса."""
+    global _redis
+
+    if _redis is not None:
+        _redis.close()
+        _redis = None
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Получить event loop процесса.
+
+    Loop живет все время работы процесса, поэтому асинхронный клиент
+    глобального кеша привязывается к нему один раз и переиспользует
+    соединения между задачами. Вызывается под _loop_lock (см. run_async).
+    """
+    global _loop
+
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop
+
+
+def run_async(coro: Coroutine[Any, Any, Any]) -> Any:
+    """
+    Выполнить корутину в event loop процесса.
+
+    Loop и привязанные к нему клиенты общие для процесса, поэтому в пуле
+    threads асинхронные части задач выполняются по очереди: параллельный
+    run_until_complete на одном loop завершился бы RuntimeError.
+    """
+    with _loop_lock:
+        return get_event_loop().run_until_complete(coro)
+
+
+def close_event_loop():
+    """Закрыть асинхронные клиенты и event loop процесса."""
+    global _loop
+
+    with _loop_lock:
+        if _loop is not None and not _loop.is_closed():
+            _loop.run_until_complete(cbr_client.close())
+            _loop.run_until_complete(cache.close())
+            _loop.close()
+        _loop = None
+
+
+@worker_process_init.connect
+def _on_worker_process_init(**kwargs):
+    global _redis, _loop
+
+    init_db_engine()
+    # Клиенты и loop, унаследованные от родителя, использовать после fork нельзя
+    _redis = None
+    _loop = None
+    cache.reset()
+    cbr_client.reset()
+
+
+@worker_process_shutdown.connect
+def _on_worker_process_shutdown(**kwargs):
+    # Последние метрики отправляем до закрытия клиента Redis
+    push_worker_metrics(force=True)
+    dispose_db_engine()
+    close_redis()
+    close_event_loop()
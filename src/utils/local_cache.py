@@ -0,0 +1,72 @@
+"""
+Кеш в памяти процесса.
+
+Используется как первый уровень перед Redis для редко меняющихся данных.
+"""
+
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any, Optional
+
+
+class TTLCache:
+    """
+    Ограниченный по размеру кеш с TTL записей.
+
+    При переполнении вытесняется давно не использованная запись (LRU).
+    Считает попадания и промахи для метрик.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Получить значение, если оно есть и не устарело."""
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Сохранить значение на ttl секунд (по умолчанию — TTL кеша)."""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        """Удалить значение."""
+        self._data.pop(key, None)
+
+    def clear(self):
+        """Удалить все значения."""
+        self._data.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        """Доля попаданий среди всех обращений."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __contains__(self, key: Hashable) -> bool:
+        item = self._data.get(key)
+        return item is not None and item[0] > time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._data)
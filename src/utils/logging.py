@@ -1,29 +1,126 @@
 """
 Настройка логирования для приложения.
+
+Записи из кода приложения попадают в очередь (QueueHandler), а вывод
+в stdout и файл выполняет отдельный поток QueueListener, поэтому
+event loop не блокируется на записи на диск.
 """
 
+import atexit
+import copy
+import json
 import logging
+import queue
 import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
+from typing import Optional
+
+from src.config.settings import LOG_FILE, LOG_FORMAT, LOG_JSON, LOG_LEVEL, LOG_LEVELS
+
+# Атрибуты LogRecord, которые не относятся к полям из extra
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Форматирует запись как JSON-объект в одну строку."""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _QueueHandler(QueueHandler):
+    """
+    QueueHandler, сохраняющий трассировку исключения отдельно от сообщения.
+    
+    Стандартный prepare() дописывает трассировку в текст сообщения,
+    и JsonFormatter не смог бы вынести ее в отдельное поле.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
 
-from src.config.settings import LOG_FORMAT, LOG_LEVEL
+def parse_log_levels(spec: str) -> dict[str, str]:
+    """
+    Разобрать уровни логгеров из строки вида "logger=LEVEL,logger=LEVEL".
+    
+    Некорректные элементы пропускаются.
+    """
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        name, level = name.strip(), level.strip().upper()
+        if name and isinstance(logging.getLevelName(level), int):
+            levels[name] = level
+    return levels
 
 
 def setup_logging():
     """Настроить логирование для приложения."""
-    # Создаем директорию для логов
-    log_dir = Path("logs")
-    log_dir.mkdir(exist_ok=True)
+    global _listener, _queue_handler
+    
+    if _listener is not None:
+        return
+    
+    formatter = JsonFormatter() if LOG_JSON else logging.Formatter(LOG_FORMAT)
+    handlers: list[logging.Handler] = [logging.StreamHandler(sys.stdout)]
+    if LOG_FILE:
+        # Создаем директорию для логов
+        log_path = Path(LOG_FILE)
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        handlers.append(logging.FileHandler(log_path, encoding="utf-8"))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
     
     # Настраиваем корневой логгер
-    logging.basicConfig(
-        level=getattr(logging, LOG_LEVEL.upper()),
-        format=LOG_FORMAT,
-        handlers=[
-            logging.StreamHandler(sys.stdout),
-            logging.FileHandler(log_dir / "dostavka.log", encoding="utf-8")
-        ]
-    )
+    root = logging.getLogger()
+    root.setLevel(getattr(logging, LOG_LEVEL.upper()))
+    _queue_handler = _QueueHandler(log_queue)
+    root.addHandler(_queue_handler)
+    
+    for name, level in parse_log_levels(LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level)
+
+
+def stop_logging():
+    """Дописать накопленные записи и остановить поток логирования."""
+    global _listener, _queue_handler
+    
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
 
 
 def get_logger(name: str) -> logging.Logger:
@@ -0,0 +1,328 @@
+"""
+Метрики приложения в формате Prometheus.
+
+Реестр метрик хранится в памяти процесса и отдается эндпоинтом /metrics.
+Кроме накопленных метрик, ведутся замеры текущего запроса (время в БД,
+число запросов, обращения к кешу, постановка задач в очередь) — они
+попадают в заголовок Server-Timing ответа.
+"""
+
+import bisect
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Iterator, Sequence
+from contextvars import ContextVar
+from typing import Optional
+
+# Границы бакетов гистограмм длительности, секунды
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(labelnames: Sequence[str], labelvalues: Sequence[str], extra: str = "") -> str:
+    """Сформировать {name="value",...} с экранированием значений."""
+    pairs = [
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in zip(labelnames, labelvalues)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric(ABC):
+    """Базовый класс метрики с метками."""
+
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    @abstractmethod
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        """Сэмплы метрики: (суффикс имени, метки, значение)."""
+
+    def snapshot(self) -> dict:
+        """Описание и значения метрики, пригодные для JSON."""
+        with self._lock:
+            values = [[list(key), value] for key, value in self._dump()]
+        return {
+            "type": self.type,
+            "documentation": self.documentation,
+            "labelnames": list(self.labelnames),
+            "values": values,
+        }
+
+    def merge(self, values: list):
+        """Прибавить значения из snapshot() другого процесса."""
+        with self._lock:
+            for key, value in values:
+                self._add(tuple(key), value)
+
+    @abstractmethod
+    def _dump(self) -> Iterator[tuple[tuple, object]]:
+        """Значения по меткам (вызывается под блокировкой)."""
+
+    @abstractmethod
+    def _add(self, key: tuple, value):
+        """Прибавить значение для меток key (вызывается под блокировкой)."""
+
+    def render(self) -> str:
+        """Метрика в текстовом формате Prometheus."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        lines.extend(
+            f"{self.name}{suffix}{labels} {_format_value(value)}"
+            for suffix, labels, value in self.samples()
+        )
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """Монотонно растущий счетчик."""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _dump(self) -> Iterator[tuple[tuple, float]]:
+        return iter(list(self._values.items()))
+
+    def _add(self, key: tuple, value: float):
+        self._values[key] = self._values.get(key, 0.0) + value
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield "", _format_labels(self.labelnames, key), value
+
+
+class Histogram(Metric):
+    """Гистограмма наблюдений с фиксированными бакетами."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # метки -> [счетчики бакетов (не накопленные) + бакет +Inf, сумма]
+        self._values: dict[tuple, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    def count(self, **labels) -> int:
+        item = self._values.get(self._key(labels))
+        return sum(item[0]) if item else 0
+
+    def snapshot(self) -> dict:
+        return dict(super().snapshot(), buckets=list(self.buckets))
+
+    def _dump(self) -> Iterator[tuple[tuple, list]]:
+        return iter([(key, [list(counts), total[0]]) for key, (counts, total) in self._values.items()])
+
+    def _add(self, key: tuple, value: list):
+        counts, total = value
+        if len(counts) != len(self.buckets) + 1:
+            # Бакеты другого процесса не совпадают с нашими — значения несравнимы
+            return
+        own_counts, own_total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+        for index, count in enumerate(counts):
+            own_counts[index] += count
+        own_total[0] += total
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        with self._lock:
+            values = [(key, list(counts), total[0]) for key, (counts, total) in self._values.items()]
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield "_bucket", _format_labels(self.labelnames, key, le), cumulative
+            yield "_sum", _format_labels(self.labelnames, key), total
+            yield "_count", _format_labels(self.labelnames, key), cumulative
+
+
+class MetricsRegistry:
+    """Набор метрик процесса."""
+
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: Metric) -> Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric):
+                    raise ValueError(f"Метрика {metric.name} уже зарегистрирована с другим типом")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Получить (или создать) счетчик."""
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Получить (или создать) гистограмму."""
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате Prometheus."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        if not metrics:
+            return ""
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+    def snapshot(self) -> dict:
+        """Все метрики в виде, пригодном для JSON (для передачи между процессами)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+    def merge(self, snapshot: dict):
+        """
+        Прибавить метрики из snapshot() другого процесса.
+
+        Счетчики и гистограммы с одинаковыми метками суммируются.
+        """
+        for name, data in snapshot.items():
+            if data["type"] == Histogram.type:
+                metric = self.histogram(name, data["documentation"], data["labelnames"], data["buckets"])
+            elif data["type"] == Counter.type:
+                metric = self.counter(name, data["documentation"], data["labelnames"])
+            else:
+                continue
+            metric.merge(data["values"])
+
+
+# Глобальный реестр метрик процесса
+registry = MetricsRegistry()
+
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "Длительность обработки HTTP-запроса", ("method", "route", "status")
+)
+db_query_duration = registry.histogram(
+    "db_query_duration_seconds", "Длительность SQL-запроса"
+)
+cache_requests = registry.counter(
+    "cache_requests_total", "Обращения к Redis-кешу за значением", ("result",)
+)
+cache_operation_duration = registry.histogram(
+    "cache_operation_duration_seconds", "Длительность операции с Redis-кешем", ("operation",)
+)
+session_cache_requests = registry.counter(
+    "session_cache_requests_total", "Проверки кеша известных сессий: hit, redis_hit, miss", ("result",)
+)
+task_enqueue_duration = registry.histogram(
+    "celery_task_enqueue_duration_seconds", "Длительность отправки задачи Celery в брокер", ("task",)
+)
+
+
+class RequestTimings:
+    """Замеры текущего HTTP-запроса."""
+
+    __slots__ = ("db_time", "db_queries", "cache_time", "cache_hits", "cache_misses", "enqueue_time", "enqueued")
+
+    def __init__(self):
+        self.db_time = 0.0
+        self.db_queries = 0
+        self.cache_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.enqueue_time = 0.0
+        self.enqueued = 0
+
+    def server_timing(self, total: float) -> str:
+        """Значение заголовка Server-Timing (длительности в миллисекундах)."""
+        return ", ".join([
+            f"app;dur={total * 1000:.2f}",
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.db_queries} queries"',
+            f'cache;dur={self.cache_time * 1000:.2f};desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+            f'queue;dur={self.enqueue_time * 1000:.2f};desc="{self.enqueued} tasks"',
+        ])
+
+
+# Замеры текущего запроса; None вне HTTP-запроса (фоновые задачи, Celery)
+request_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def record_db_query(duration: float):
+    """Учесть выполненный SQL-запрос."""
+    db_query_duration.observe(duration)
+    timings = request_timings.get()
+    if timings is not None:
+        timings.db_time += duration
+        timings.db_queries += 1
+
+
+def record_cache_operation(operation: str, duration: float, hit: Optional[bool] = None):
+    """
+    Учесть операцию с Redis-кешем.
+
+    Args:
+        hit: Для чтения значения — найдено ли оно (None для прочих операций и ошибок)
+    """
+    cache_operation_duration.observe(duration, operation=operation)
+    if operation == "get":
+        cache_requests.inc(result="error" if hit is None else "hit" if hit else "miss")
+    timings = request_timings.get()
+    if timings is not None:
+        timings.cache_time += duration
+        if hit is True:
+            timings.cache_hits += 1
+        elif hit is False:
+            timings.cache_misses += 1
+
+
+def record_enqueue(task: str, duration: float):
+    """Учесть отправку задачи Celery в брокер."""
+    task_enqueue_duration.observe(duration, task=task)
+    timings = request_timings.get()
+    if timings is not None:
+        timings.enqueue_time += duration
+        timings.enqueued += 1
@@ -0,0 +1,37 @@
+"""
+Курсорная (keyset) пагинация.
+
+Курсор — непрозрачная для клиента строка, кодирующая ключ сортировки
+последней записи страницы: (created_at, id).
+"""
+
+import base64
+import binascii
+import uuid
+from datetime import datetime
+
+
+class InvalidCursorError(ValueError):
+    """Курсор не удалось разобрать."""
+
+
+def encode_cursor(created_at: datetime, record_id: uuid.UUID) -> str:
+    """Закодировать ключ сортировки записи в курсор."""
+    raw = f"{created_at.isoformat()}|{record_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    """
+    Раскодировать курсор в ключ сортировки.
+
+    Raises:
+        InvalidCursorError: Если курсор поврежден
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        created_at, record_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), uuid.UUID(record_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise InvalidCursorError(f"Некорректный курсор: {cursor}") from e
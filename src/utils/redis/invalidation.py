@@ -0,0 +1,68 @@
+"""
+Инвалидация кешей в памяти процессов через Redis Pub/Sub.
+
+Процесс, изменивший данные, публикует ключ в INVALIDATION_CHANNEL,
+а все экземпляры приложения вызывают зарегистрированный для этого
+ключа обработчик (обычно — сброс локальной копии).
+"""
+
+import asyncio
+from collections.abc import Callable
+
+from src.config.settings import CACHE_KEY_PREFIX
+from src.utils.logging import get_logger
+from src.utils.redis.redis_cache import cache
+
+logger = get_logger(__name__)
+
+INVALIDATION_CHANNEL = f"{CACHE_KEY_PREFIX}:invalidate"
+
+# Ключ -> сброс локальной копии данных
+_handlers: dict[str, Callable[[], None]] = {}
+
+
+def register_invalidation_handler(key: str, handler: Callable[[], None]):
+    """Вызывать handler при получении сообщения об изменении key."""
+    _handlers[key] = handler
+
+
+def invalidate_local(key: str):
+    """Сбросить локальную копию key в текущем процессе."""
+    handler = _handlers.get(key)
+    if handler is not None:
+        handler()
+
+
+async def publish_invalidation(key: str) -> bool:
+    """Сообщить всем экземплярам приложения, что данные key изменились."""
+    return await cache.publish(INVALIDATION_CHANNEL, key)
+
+
+async def listen_invalidations(retry_delay: float = 5.0):
+    """
+    Вызывать обработчики по сообщениям из INVALIDATION_CHANNEL.
+
+    Работает до отмены задачи, при потере соединения с Redis переподписывается.
+    Сообщения, отправленные во время разрыва, теряются, поэтому после
+    переподписки сбрасываются все локальные копии.
+    """
+    reconnect = False
+    while True:
+        try:
+            client = await cache.get_client()
+            async with client.pubsub() as pubsub:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                if reconnect:
+                    for handler in list(_handlers.values()):
+                        handler()
+                    logger.info("Подписка на инвалидацию восстановлена, локальные кеши сброшены")
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        invalidate_local(message["data"])
+                        logger.debug("Локальный кеш %s сброшен по сообщению инвалидации", message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Ошибка подписки на инвалидацию кеша: %s", e)
+            reconnect = True
+            await asyncio.sleep(retry_delay)
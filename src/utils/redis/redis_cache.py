@@ -1,13 +1,23 @@
 import json
+import time
 from typing import Any, Optional
 
 from src.utils.logging import get_logger
+from src.utils.metrics import record_cache_operation
 from src.config.settings import REDIS_URL
 from redis.asyncio import Redis
 
 # Получаем логгер для модуля
 logger = get_logger(__name__)
 
+# Удаляем ключ блокировки, только если его значение совпадает с токеном владельца
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
 class RedisCache:
     def __init__(self, redis_url: str = REDIS_URL):
         self.redis_url = redis_url
@@ -25,30 +35,117 @@ class RedisCache:
 
     async def get(self, key: str) -> Optional[Any]:
         """Получить значение из кэша"""
+        started = time.perf_counter()
         try:
             client = await self.get_client()
             value = await client.get(key)
             if value:
-                logger.debug(f"Значение получено из кэша: {key}")
+                logger.debug("Значение получено из кэша: %s", key)
+                record_cache_operation("get", time.perf_counter() - started, hit=True)
                 return json.loads(value)
             else:
-                logger.debug(f"Ключ не найден в кэше: {key}")
+                logger.debug("Ключ не найден в кэше: %s", key)
+                record_cache_operation("get", time.perf_counter() - started, hit=False)
                 return None
         except Exception as e:
-            logger.error(f"Ошибка получения значения из кэша {key}: {e}")
+            logger.error("Ошибка получения значения из кэша %s: %s", key, e)
+            record_cache_operation("get", time.perf_counter() - started)
             return None
 
     async def set(self, key: str, value: Any, expire_seconds: int = 3600) -> bool:
         """Установить значение в кэш с TTL"""
+        started = time.perf_counter()
         try:
             client = await self.get_client()
             await client.setex(key, expire_seconds, json.dumps(value))
-            logger.debug(f"Значение установлено в кэш: {key}, TTL: {expire_seconds} сек")
+            logger.debug("Значение установлено в кэш: %s, TTL: %s сек", key, expire_seconds)
+            return True
+        except Exception as e:
+            logger.error("Ошибка установки значения в кэш %s: %s", key, e)
+            return False
+        finally:
+            record_cache_operation("set", time.perf_counter() - started)
+
+    async def hgetall(self, key: str) -> dict[str, str]:
+        """Получить все поля хеша (пустой словарь, если ключа нет или Redis недоступен)"""
+        try:
+            client = await self.get_client()
+            return await client.hgetall(key)
+        except Exception as e:
+            logger.error("Ошибка получения хеша %s: %s", key, e)
+            return {}
+
+    async def exists(self, key: str) -> bool:
+        """Проверить наличие ключа в кэше"""
+        try:
+            client = await self.get_client()
+            return bool(await client.exists(key))
+        except Exception as e:
+            logger.error("Ошибка проверки ключа в кэше %s: %s", key, e)
+            return False
+
+    async def ttl(self, key: str) -> Optional[int]:
+        """Получить оставшееся время жизни ключа в секундах"""
+        try:
+            client = await self.get_client()
+            remaining = await client.ttl(key)
+            return remaining if remaining >= 0 else None
+        except Exception as e:
+            logger.error("Ошибка получения TTL ключа %s: %s", key, e)
+            return None
+
+    async def delete(self, key: str) -> bool:
+        """Удалить значение из кэша"""
+        try:
+            client = await self.get_client()
+            await client.delete(key)
+            return True
+        except Exception as e:
+            logger.error("Ошибка удаления значения из кэша %s: %s", key, e)
+            return False
+
+    async def acquire_lock(self, key: str, token: str, expire_seconds: int) -> Optional[bool]:
+        """
+        Захватить блокировку (SET NX EX).
+
+        Возвращает True при успехе, False если блокировка уже занята
+        и None при ошибке Redis.
+        """
+        try:
+            client = await self.get_client()
+            return bool(await client.set(key, token, nx=True, ex=expire_seconds))
+        except Exception as e:
+            logger.error("Ошибка захвата блокировки %s: %s", key, e)
+            return None
+
+    async def release_lock(self, key: str, token: str) -> bool:
+        """Освободить блокировку, только если она принадлежит token"""
+        try:
+            client = await self.get_client()
+            return bool(await client.eval(_RELEASE_LOCK_SCRIPT, 1, key, token))
+        except Exception as e:
+            logger.error("Ошибка освобождения блокировки %s: %s", key, e)
+            return False
+
+    async def publish(self, channel: str, message: str) -> bool:
+        """Опубликовать сообщение в канал pub/sub"""
+        try:
+            client = await self.get_client()
+            await client.publish(channel, message)
             return True
         except Exception as e:
-            logger.error(f"Ошибка установки значения в кэш {key}: {e}")
+            logger.error("Ошибка публикации в канал %s: %s", channel, e)
             return False
 
+    async def push(self, key: str, *values: str) -> Optional[int]:
+        """Добавить значения в конец списка, вернуть новую длину списка"""
+        try:
+            client = await self.get_client()
+            return await client.rpush(key, *values)
+        except Exception as e:
+            logger.error("Ошибка добавления в список %s: %s", key, e)
+            return None
+
     async def close(self):
         """Закрыть соединение"""
         if self._client:
@@ -56,6 +153,10 @@ class RedisCache:
             self._client = None
             logger.info("Соединение с Redis закрыто")
 
+    def reset(self):
+        """Забыть клиент без закрытия (например, унаследованный при fork)"""
+        self._client = None
+
 
 # Глобальный экземпляр кэша
 cache = RedisCache()
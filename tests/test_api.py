@@ -1,6 +1,16 @@
+import json
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
 import pytest
 from fastapi import status
 
+from src.models.db import ShippingStatus
+from src.services.package_types import PackageTypeRegistry, PackageTypes
+
 
 class TestPackageEndpoints:
     """Тесты для endpoints посылок"""
@@ -55,6 +65,110 @@ class TestPackageEndpoints:
         response = client.get("/packages/?has_shipping_cost=true&page=1&size=10")
         assert response.status_code in [status.HTTP_403_FORBIDDEN, status.HTTP_500_INTERNAL_SERVER_ERROR]
 
+    def test_get_packages_response(self, client, monkeypatch):
+        """Посылки страницы сериализуются в формате PaginatedPackagesResponse"""
+        session_id = uuid.uuid4()
+        package = SimpleNamespace(
+            id=uuid.uuid4(), name="Test", weight=1.5, type_id=1, price=1000.0,
+            shipping_cost=Decimal("1234.5"), shipping_status=ShippingStatus.CALCULATED,
+            session_id=session_id, created_at=datetime(2025, 1, 1),
+        )
+        registry = PackageTypeRegistry()
+        registry._types = PackageTypes({1: "Электроника"})
+        monkeypatch.setattr("src.services.packages.package_types", registry)
+        monkeypatch.setattr(
+            "src.repositories.packages.PackageRepository.get_by_session_id",
+            AsyncMock(return_value=([package], 11)),
+        )
+
+        client.cookies.set("session_id", str(session_id))
+        response = client.get("/packages/?page=1&size=1")
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["packages"] == [{
+            "id": str(package.id),
+            "name": "Test",
+            "weight": 1.5,
+            "type_id": 1,
+            "type_name": "Электроника",
+            "price": 1000.0,
+            "shipping_cost": "1234.50",
+            "shipping_status": "calculated",
+            "session_id": str(session_id),
+        }]
+        assert (data["total"], data["page"], data["size"], data["pages"]) == (11, 1, 1, 11)
+        assert data["next_cursor"]
+
+
+class TestBulkEndpoint:
+    """Тесты массового создания посылок"""
+
+    def test_bulk_invalid_item(self, client, sample_package_data):
+        """Ошибка указывает на индекс некорректной посылки"""
+        invalid = dict(sample_package_data, weight=-1)
+        response = client.post("/packages/bulk", json=[sample_package_data, invalid])
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert response.json()["detail"][0]["loc"] == ["body", 1, "weight"]
+
+    def test_bulk_empty_list(self, client):
+        """Пустой список отклоняется"""
+        response = client.post("/packages/bulk", json=[])
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_bulk_invalid_json(self, client):
+        """Некорректный JSON отклоняется"""
+        response = client.post(
+            "/packages/bulk", content=b"[{", headers={"Content-Type": "application/json"}
+        )
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_bulk_ndjson_invalid_line(self, client, sample_package_data):
+        """Ошибка в NDJSON указывает на номер посылки"""
+        body = "\n".join([
+            json.dumps(sample_package_data),
+            "",
+            json.dumps(dict(sample_package_data, name="")),
+        ])
+        response = client.post(
+            "/packages/bulk", content=body, headers={"Content-Type": "application/x-ndjson"}
+        )
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert response.json()["detail"][0]["loc"] == ["body", 1, "name"]
+
+    def test_bulk_too_many_items(self, client, sample_package_data, monkeypatch):
+        """Слишком большой запрос отклоняется"""
+        monkeypatch.setattr("src.routes.packages.BULK_MAX_ITEMS", 2)
+        response = client.post("/packages/bulk", json=[sample_package_data] * 3)
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+        body = "\n".join(json.dumps(sample_package_data) for _ in range(3))
+        response = client.post(
+            "/packages/bulk", content=body, headers={"Content-Type": "application/x-ndjson"}
+        )
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+    def test_bulk_too_large_body(self, client, sample_package_data, monkeypatch):
+        """Слишком большое тело отклоняется до валидации посылок"""
+        monkeypatch.setattr("src.routes.packages.BULK_MAX_ITEMS", 2)
+        monkeypatch.setattr("src.routes.packages.BULK_MAX_ITEM_BYTES", 100)
+        validate = MagicMock()
+        monkeypatch.setattr("src.routes.packages._bulk_adapter", MagicMock(validate_python=validate))
+
+        response = client.post("/packages/bulk", json=[dict(sample_package_data, name="x" * 300)])
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        validate.assert_not_called()
+
+    def test_bulk_items_counted_before_validation(self, client, sample_package_data, monkeypatch):
+        """Число посылок проверяется до построения моделей"""
+        monkeypatch.setattr("src.routes.packages.BULK_MAX_ITEMS", 2)
+        validate = MagicMock()
+        monkeypatch.setattr("src.routes.packages._bulk_adapter", MagicMock(validate_python=validate))
+
+        response = client.post("/packages/bulk", json=[{}] * 3)
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        validate.assert_not_called()
+
 
 class TestValidation:
     """Тесты валидации данных"""
@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.external.cbr_api import CBRAPIError, CBRClient
+
+CBR_RESPONSE = '{"Valute": {"USD": {"CharCode": "USD", "Value": 92.5}}}'
+
+
+@pytest.fixture
+async def cbr_stub():
+    """Локальная заглушка API ЦБ: отдает ответы из очереди статусов"""
+    state = {"statuses": [], "requests": 0, "peers": set()}
+
+    async def daily_json(request):
+        state["requests"] += 1
+        state["peers"].add(request.transport.get_extra_info("peername"))
+        status = state["statuses"].pop(0) if state["statuses"] else 200
+        if status != 200:
+            return web.Response(status=status)
+        return web.Response(text=CBR_RESPONSE, content_type="application/javascript")
+
+    app = web.Application()
+    app.router.add_get("/daily_json.js", daily_json)
+    server = TestServer(app)
+    await server.start_server()
+    yield server, state
+    await server.close()
+
+
+@pytest.fixture
+async def make_client(cbr_stub):
+    server, _ = cbr_stub
+    clients = []
+
+    def factory(**kwargs):
+        client = CBRClient(url=str(server.make_url("/daily_json.js")), backoff=0.01, **kwargs)
+        clients.append(client)
+        return client
+
+    yield factory
+    for client in clients:
+        await client.close()
+
+
+class TestCBRClient:
+    """Тесты клиента API ЦБ РФ на локальной заглушке"""
+
+    async def test_fetch_rate(self, cbr_stub, make_client):
+        """Тест разбора курса из ответа с Content-Type application/javascript"""
+        client = make_client()
+        assert await client.fetch_usd_rub_rate() == 92.5
+
+    async def test_session_is_reused(self, cbr_stub, make_client):
+        """Повторные запросы идут через одно keep-alive соединение"""
+        _, state = cbr_stub
+        client = make_client()
+
+        for _ in range(3):
+            await client.fetch_usd_rub_rate()
+
+        assert state["requests"] == 3
+        assert len(state["peers"]) == 1
+
+    async def test_retry_on_server_error(self, cbr_stub, make_client):
+        """Ответы 5xx повторяются с задержкой"""
+        _, state = cbr_stub
+        state["statuses"] = [503, 500]
+        client = make_client(retries=2)
+
+        assert await client.fetch_usd_rub_rate() == 92.5
+        assert state["requests"] == 3
+
+    async def test_no_retry_on_client_error(self, cbr_stub, make_client):
+        """Ответы 4xx не повторяются"""
+        _, state = cbr_stub
+        state["statuses"] = [404]
+        client = make_client(retries=2)
+
+        with pytest.raises(CBRAPIError):
+            await client.fetch_usd_rub_rate()
+        assert state["requests"] == 1
+
+    async def test_retries_exhausted(self, cbr_stub, make_client):
+        """После исчерпания попыток ошибка пробрасывается"""
+        _, state = cbr_stub
+        state["statuses"] = [502, 502, 502]
+        client = make_client(retries=1)
+
+        with pytest.raises(CBRAPIError):
+            await client.fetch_usd_rub_rate()
+        assert state["requests"] == 2
+
+    async def test_session_from_other_loop_is_closed(self, make_client):
+        """Сессия прежнего event loop закрывается при смене loop"""
+        client = make_client()
+        stale = await asyncio.to_thread(asyncio.run, client.get_session())
+
+        session = await client.get_session()
+
+        assert stale.closed
+        assert session is not stale
+        assert not session.closed
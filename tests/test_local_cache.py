@@ -0,0 +1,52 @@
+import time
+
+from src.utils.local_cache import TTLCache
+
+
+class TestTTLCache:
+    """Тесты кеша в памяти процесса"""
+
+    def test_get_set(self):
+        """Тест сохранения и получения значения"""
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("key", 1.5)
+
+        assert cache.get("key") == 1.5
+        assert cache.get("missing") is None
+        assert cache.hits == 1
+        assert cache.misses == 1
+        assert cache.hit_rate == 0.5
+
+    def test_expiration(self):
+        """Тест устаревания записи по TTL"""
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("key", "value", ttl=0.01)
+        time.sleep(0.02)
+
+        assert cache.get("key") is None
+        assert "key" not in cache
+        assert len(cache) == 0
+
+    def test_lru_eviction(self):
+        """Тест вытеснения давно не использованной записи"""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+
+    def test_delete_and_clear(self):
+        """Тест удаления записей"""
+        cache = TTLCache()
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.delete("a")
+        cache.delete("missing")
+
+        assert "a" not in cache
+        cache.clear()
+        assert len(cache) == 0
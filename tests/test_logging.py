@@ -0,0 +1,53 @@
+import json
+import logging
+import queue
+import sys
+
+from src.utils.logging import JsonFormatter, _QueueHandler, parse_log_levels
+
+
+def make_record(msg, *args, exc_info=None, **extra):
+    record = logging.LogRecord("src.test", logging.ERROR, __file__, 1, msg, args, exc_info)
+    record.__dict__.update(extra)
+    return record
+
+
+class TestJsonFormatter:
+    """Тесты структурированного вывода"""
+
+    def test_fields(self):
+        """Сообщение форматируется лениво, поля extra попадают в JSON"""
+        line = JsonFormatter().format(make_record("Посылка %s создана", 42, package_id="abc"))
+        entry = json.loads(line)
+
+        assert entry["message"] == "Посылка 42 создана"
+        assert entry["level"] == "ERROR"
+        assert entry["logger"] == "src.test"
+        assert entry["package_id"] == "abc"
+        assert "time" in entry
+
+    def test_exception_through_queue(self):
+        """Трассировка проходит через очередь отдельным полем"""
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = make_record("Ошибка %s", "расчета", exc_info=sys.exc_info())
+
+        log_queue = queue.SimpleQueue()
+        _QueueHandler(log_queue).handle(record)
+        entry = json.loads(JsonFormatter().format(log_queue.get_nowait()))
+
+        assert entry["message"] == "Ошибка расчета"
+        assert "ValueError: boom" in entry["exception"]
+
+
+class TestLogLevels:
+    """Тесты разбора уровней логгеров"""
+
+    def test_parse(self):
+        """Корректные элементы разбираются, некорректные пропускаются"""
+        levels = parse_log_levels(" sqlalchemy.engine=warning, src.utils.redis=DEBUG,bad,x=NOPE,")
+        assert levels == {"sqlalchemy.engine": "WARNING", "src.utils.redis": "DEBUG"}
+
+    def test_empty(self):
+        assert parse_log_levels("") == {}
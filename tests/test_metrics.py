@@ -0,0 +1,297 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from celery.signals import (
+    after_task_publish,
+    before_task_publish,
+    task_postrun,
+    task_prerun,
+    task_retry,
+)
+from fastapi import status
+
+from src.utils.celery import metrics as celery_metrics
+from src.utils.metrics import (
+    Metric,
+    MetricsRegistry,
+    RequestTimings,
+    record_cache_operation,
+    record_db_query,
+    record_enqueue,
+    request_timings,
+    task_enqueue_duration,
+)
+from src.utils.redis.redis_cache import cache
+
+
+class TestRegistry:
+    """Тесты реестра метрик и формата Prometheus"""
+
+    def test_counter(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("requests_total", "Запросы", ("result",))
+        counter.inc(result="hit")
+        counter.inc(2, result='mi"ss')
+
+        text = registry.render()
+        assert "# TYPE requests_total counter" in text
+        assert 'requests_total{result="hit"} 1' in text
+        assert 'requests_total{result="mi\\"ss"} 2' in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        histogram = registry.histogram("duration_seconds", "Длительность", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.7, 3.0):
+            histogram.observe(value)
+
+        text = registry.render()
+        assert 'duration_seconds_bucket{le="0.1"} 1' in text
+        assert 'duration_seconds_bucket{le="1"} 3' in text
+        assert 'duration_seconds_bucket{le="+Inf"} 4' in text
+        assert "duration_seconds_count 4" in text
+        assert "duration_seconds_sum 4.25" in text
+
+    def test_register_returns_existing(self):
+        registry = MetricsRegistry()
+        assert registry.counter("a_total", "A") is registry.counter("a_total", "A")
+
+    def test_snapshot_merge_sums_values(self):
+        """Снимки метрик нескольких процессов суммируются"""
+        worker = MetricsRegistry()
+        worker.counter("tasks_total", "Задачи", ("state",)).inc(state="SUCCESS")
+        worker.histogram("run_seconds", "Выполнение", buckets=(0.1, 1.0)).observe(0.5)
+        snapshot = json.loads(json.dumps(worker.snapshot()))
+
+        merged = MetricsRegistry()
+        merged.merge(snapshot)
+        merged.merge(snapshot)
+
+        text = merged.render()
+        assert 'tasks_total{state="SUCCESS"} 2' in text
+        assert 'run_seconds_bucket{le="1"} 2' in text
+        assert "run_seconds_sum 1" in text
+
+    def test_merge_skips_mismatched_buckets(self):
+        worker = MetricsRegistry()
+        worker.histogram("run_seconds", "Выполнение", buckets=(0.1,)).observe(0.05)
+
+        merged = MetricsRegistry()
+        merged.histogram("run_seconds", "Выполнение", buckets=(0.1, 1.0))
+        merged.merge(worker.snapshot())
+        assert merged.histogram("run_seconds", "Выполнение").count() == 0
+
+    def test_incomplete_metric_cannot_be_created(self):
+        class Gauge(Metric):
+            type = "gauge"
+
+        with pytest.raises(TypeError):
+            Gauge("queue_size", "Размер очереди")
+
+    def test_empty_registry_renders_nothing(self):
+        assert MetricsRegistry().render() == ""
+
+
+class TestRequestTimings:
+    """Тесты замеров текущего запроса"""
+
+    def test_records_into_current_request(self):
+        timings = RequestTimings()
+        token = request_timings.set(timings)
+        try:
+            record_db_query(0.002)
+            record_db_query(0.003)
+            record_cache_operation("get", 0.001, hit=True)
+            record_cache_operation("get", 0.001, hit=False)
+            record_enqueue("tasks.test", 0.004)
+        finally:
+            request_timings.reset(token)
+
+        assert timings.db_queries == 2
+        assert abs(timings.db_time - 0.005) < 1e-9
+        assert (timings.cache_hits, timings.cache_misses) == (1, 1)
+        assert timings.enqueued == 1
+        assert 'db;dur=5.00;desc="2 queries"' in timings.server_timing(0.01)
+
+    def test_outside_request(self):
+        """Вне запроса замеры учитываются только в метриках"""
+        record_db_query(0.001)
+        assert request_timings.get() is None
+
+    def test_publish_signals(self):
+        """Длительность отправки задачи замеряется по сигналам публикации"""
+        before = task_enqueue_duration.count(task="tasks.signal_test")
+        headers = {"id": "task-1"}
+        before_task_publish.send(sender="tasks.signal_test", headers=headers)
+        after_task_publish.send(sender="tasks.signal_test", headers=headers)
+
+        assert task_enqueue_duration.count(task="tasks.signal_test") == before + 1
+
+
+class FakeRedis:
+    """Синхронный клиент Redis с хешами и конвейером команд"""
+
+    def __init__(self):
+        self.hashes = {}
+        self.ttl = {}
+        self.commands = []
+
+    def pipeline(self):
+        return self
+
+    def hincrbyfloat(self, key, field, amount):
+        self.commands.append(("hincrbyfloat", field, amount))
+        values = self.hashes.setdefault(key, {})
+        values[field] = str(float(values.get(field, 0)) + amount)
+
+    def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(mapping)
+
+    def expire(self, key, seconds):
+        self.ttl[key] = seconds
+
+    def execute(self):
+        pass
+
+    def increments(self):
+        """Поля, изменённые с предыдущего вызова"""
+        fields = [field for command, field, _ in self.commands if command == "hincrbyfloat"]
+        self.commands.clear()
+        return fields
+
+
+@pytest.fixture
+def worker_redis(monkeypatch):
+    """Отправка метрик worker'а в FakeRedis с чистым состоянием"""
+    redis = FakeRedis()
+    monkeypatch.setattr("src.utils.celery.worker.get_redis", lambda: redis)
+    monkeypatch.setattr(celery_metrics, "_last_push", float("-inf"))
+    monkeypatch.setattr(celery_metrics, "_pushed", {})
+    return redis
+
+
+class FakeTask:
+    """Задача Celery с контекстом выполнения"""
+
+    def __init__(self, name, **request):
+        self.name = name
+        self.request = SimpleNamespace(**request)
+
+
+class TestWorkerMetrics:
+    """Тесты метрик выполнения задач в worker'е"""
+
+    def test_task_signals(self, worker_redis):
+        name = "tasks.worker_test"
+        wait_before = celery_metrics.task_queue_wait.count(task=name)
+
+        headers = {"id": "task-2"}
+        before_task_publish.send(sender=name, headers=headers)
+        task = FakeTask(name, enqueued_at=headers["enqueued_at"])
+        task_prerun.send(sender=task, task_id="task-2", task=task)
+        task_retry.send(sender=task, request=task.request, reason="test")
+        task_postrun.send(sender=task, task_id="task-2", task=task, state="SUCCESS")
+
+        assert celery_metrics.task_queue_wait.count(task=name) == wait_before + 1
+        assert celery_metrics.task_run_duration.count(task=name) >= 1
+        assert celery_metrics.tasks_total.get(task=name, state="SUCCESS") >= 1
+        assert celery_metrics.task_retries.get(task=name) >= 1
+
+        assert "celery_tasks_total" in worker_redis.hashes[celery_metrics.WORKER_METRICS_META_KEY]
+        assert worker_redis.ttl[celery_metrics.WORKER_METRICS_KEY] > 0
+        assert worker_redis.ttl[celery_metrics.WORKER_METRICS_META_KEY] > 0
+
+    def test_push_sends_only_increments(self, worker_redis):
+        counter = celery_metrics.tasks_total
+        field = json.dumps(["celery_tasks_total", ["tasks.delta_test", "SUCCESS"], None])
+        counter.inc(task="tasks.delta_test", state="SUCCESS")
+
+        assert celery_metrics.push_worker_metrics(force=True)
+        assert field in worker_redis.increments()
+        before = float(worker_redis.hashes[celery_metrics.WORKER_METRICS_KEY][field])
+
+        # Без новых событий отправлять нечего
+        assert celery_metrics.push_worker_metrics(force=True)
+        assert worker_redis.increments() == []
+
+        counter.inc(2, task="tasks.delta_test", state="SUCCESS")
+        assert celery_metrics.push_worker_metrics(force=True)
+        assert worker_redis.increments() == [field]
+        assert float(worker_redis.hashes[celery_metrics.WORKER_METRICS_KEY][field]) == before + 2
+
+    def test_restarted_process_does_not_decrease_totals(self, worker_redis, monkeypatch):
+        """Новый процесс начинает с нуля, но добавляет к общему счётчику"""
+        field = json.dumps(["celery_task_retries_total", ["tasks.restart_test"], None])
+        celery_metrics.task_retries.inc(task="tasks.restart_test")
+        celery_metrics.push_worker_metrics(force=True)
+        total = float(worker_redis.hashes[celery_metrics.WORKER_METRICS_KEY][field])
+
+        restarted = MetricsRegistry()
+        retries = restarted.counter("celery_task_retries_total", "Повторы задач", ("task",))
+        retries.inc(task="tasks.restart_test")
+        monkeypatch.setattr(celery_metrics, "worker_registry", restarted)
+        monkeypatch.setattr(celery_metrics, "_pushed", {})
+
+        assert celery_metrics.push_worker_metrics(force=True)
+        assert float(worker_redis.hashes[celery_metrics.WORKER_METRICS_KEY][field]) == total + 1
+
+    def test_snapshot_round_trip(self):
+        registry = MetricsRegistry()
+        registry.counter("jobs_total", "Задачи", ("state",)).inc(3, state="ok")
+        histogram = registry.histogram("job_seconds", "Длительность", ("task",), buckets=(0.1, 1.0))
+        histogram.observe(0.05, task="t")
+        histogram.observe(5, task="t")
+        snapshot = registry.snapshot()
+
+        values = {field: str(value) for field, value in celery_metrics._series(snapshot).items()}
+        restored = MetricsRegistry()
+        restored.merge(celery_metrics.worker_metrics_snapshot(celery_metrics._describe(snapshot), values))
+
+        assert restored.render() == registry.render()
+
+    def test_push_is_throttled(self, worker_redis):
+        assert celery_metrics.push_worker_metrics(interval=60)
+        assert not celery_metrics.push_worker_metrics(interval=60)
+        assert celery_metrics.push_worker_metrics(force=True, interval=60)
+
+    def test_push_error_is_swallowed(self, worker_redis, monkeypatch):
+        def broken_redis():
+            raise ConnectionError("redis недоступен")
+
+        celery_metrics.task_retries.inc(task="tasks.error_test")
+        monkeypatch.setattr("src.utils.celery.worker.get_redis", broken_redis)
+        assert not celery_metrics.push_worker_metrics(force=True)
+        # Неотправленные значения не считаются отправленными
+        assert celery_metrics._pushed == {}
+
+
+class TestMetricsEndpoint:
+    """Тесты middleware и эндпоинта /metrics"""
+
+    def test_server_timing_and_metrics(self, client):
+        response = client.get("/openapi.json")
+        assert "app;dur=" in response.headers["server-timing"]
+
+        response = client.get("/metrics")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/plain")
+        assert 'http_request_duration_seconds_count{method="GET",route="/openapi.json",status="200"}' in response.text
+
+    def test_includes_worker_metrics(self, client, monkeypatch):
+        """Суммарные метрики worker'ов из Redis добавляются к ответу"""
+        worker = MetricsRegistry()
+        worker.counter("celery_tasks_total", "Задачи", ("task", "state")).inc(2, task="t", state="SUCCESS")
+        snapshot = worker.snapshot()
+        hashes = {
+            celery_metrics.WORKER_METRICS_META_KEY: celery_metrics._describe(snapshot),
+            celery_metrics.WORKER_METRICS_KEY: {
+                field: str(value) for field, value in celery_metrics._series(snapshot).items()
+            },
+        }
+
+        async def hgetall(key):
+            return hashes.get(key, {})
+
+        monkeypatch.setattr(cache, "hgetall", hgetall)
+        response = client.get("/metrics")
+        assert 'celery_tasks_total{task="t",state="SUCCESS"} 2' in response.text
@@ -0,0 +1,81 @@
+import time
+
+import pytest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from src.config.settings import SESSION_COOKIE_NAME
+from src.middleware.sessions import ISSUED_COOKIE_NAME, SessionMiddleware
+
+
+async def session_endpoint(request: Request):
+    return JSONResponse({"session_id": request.state.session_id})
+
+
+async def stream_endpoint(request: Request):
+    async def chunks():
+        for chunk in (b"a", b"b", b"c"):
+            yield chunk
+    return StreamingResponse(chunks())
+
+
+async def failing_endpoint(request: Request):
+    raise RuntimeError("boom")
+
+
+@pytest.fixture
+def client():
+    app = Starlette(routes=[
+        Route("/", session_endpoint),
+        Route("/stream", stream_endpoint),
+        Route("/fail", failing_endpoint),
+    ])
+    app.add_middleware(SessionMiddleware, max_age=1000, renew_before=100)
+    return TestClient(app)
+
+
+class TestSessionMiddleware:
+    """Тесты ASGI middleware сессий"""
+
+    def test_new_session_sets_cookies(self, client):
+        """Новой сессии выдаются cookie сессии и времени выдачи"""
+        response = client.get("/")
+
+        session_id = response.json()["session_id"]
+        assert response.cookies[SESSION_COOKIE_NAME] == session_id
+        assert ISSUED_COOKIE_NAME in response.cookies
+        assert "Max-Age=1000" in response.headers["set-cookie"]
+
+    def test_fresh_session_has_no_set_cookie(self, client):
+        """Для действующей сессии cookie не отправляется заново"""
+        client.cookies.set(SESSION_COOKIE_NAME, "known-session")
+        client.cookies.set(ISSUED_COOKIE_NAME, str(int(time.time())))
+        response = client.get("/")
+
+        assert response.json()["session_id"] == "known-session"
+        assert "set-cookie" not in response.headers
+
+    @pytest.mark.parametrize("issued_at", [None, "garbage", str(int(time.time()) - 950)])
+    def test_expiring_session_is_renewed(self, client, issued_at):
+        """Cookie продлевается, если время выдачи неизвестно или срок истекает"""
+        client.cookies.set(SESSION_COOKIE_NAME, "known-session")
+        if issued_at is not None:
+            client.cookies.set(ISSUED_COOKIE_NAME, issued_at)
+        response = client.get("/")
+
+        assert response.cookies[SESSION_COOKIE_NAME] == "known-session"
+
+    def test_streaming_response(self, client):
+        """Потоковый ответ проходит без изменений"""
+        response = client.get("/stream")
+        assert response.content == b"abc"
+
+    def test_error_returns_json(self, client):
+        """Необработанная ошибка превращается в JSON-ответ 500"""
+        response = client.get("/fail")
+
+        assert response.status_code == 500
+        assert "boom" in response.json()["error"]["message"]
@@ -0,0 +1,156 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import status
+
+from src.services import package_types as package_types_module
+from src.services.package_types import (
+    PACKAGE_TYPES_KEY,
+    PackageTypeRegistry,
+    PackageTypes,
+    UnknownPackageTypeError,
+    notify_package_types_changed,
+)
+from src.utils.redis import invalidation
+
+TYPES = [
+    SimpleNamespace(id=2, name="Одежда"),
+    SimpleNamespace(id=1, name="Электроника"),
+]
+
+
+def make_repository():
+    repository = MagicMock()
+
+    async def get_all_types():
+        await asyncio.sleep(0.01)
+        return TYPES
+
+    repository.get_all_types = AsyncMock(side_effect=get_all_types)
+    return repository
+
+
+class TestPackageTypes:
+    """Тесты снимка типов посылок"""
+
+    def test_snapshot(self):
+        """Снимок отсортирован, неизменяем и содержит готовое тело ответа"""
+        types = PackageTypes({t.id: t.name for t in TYPES})
+
+        assert types.as_list() == [
+            {"id": 1, "name": "Электроника"},
+            {"id": 2, "name": "Одежда"},
+        ]
+        assert 1 in types and 3 not in types
+        assert "Электроника".encode() in types.body
+        with pytest.raises(TypeError):
+            types.names[3] = "Книги"
+
+    def test_etag_depends_on_content(self):
+        """ETag совпадает для одинаковых типов и меняется при изменении"""
+        first = PackageTypes({1: "Электроника"})
+        assert first.etag == PackageTypes({1: "Электроника"}).etag
+        assert first.etag != PackageTypes({1: "Книги"}).etag
+
+    def test_validate(self):
+        """Неизвестные типы собираются в одну ошибку с путями к полям"""
+        types = PackageTypes({t.id: t.name for t in TYPES})
+        types.validate([((0, "type_id"), 1), ((1, "type_id"), 2)])
+
+        with pytest.raises(UnknownPackageTypeError) as exc_info:
+            types.validate(
+                [((0, "type_id"), 1), ((1, "type_id"), 7), ((2, "type_id"), 9)]
+            )
+        assert exc_info.value.invalid == [((1, "type_id"), 7), ((2, "type_id"), 9)]
+
+
+class TestPackageTypeRegistry:
+    """Тесты реестра типов посылок"""
+
+    async def test_concurrent_get_loads_once(self):
+        """Параллельные обращения к незагруженному реестру читают БД один раз"""
+        registry = PackageTypeRegistry()
+        repository = make_repository()
+
+        results = await asyncio.gather(*(registry.get(repository) for _ in range(10)))
+
+        assert all(types is results[0] for types in results)
+        assert repository.get_all_types.await_count == 1
+
+    async def test_invalidate_reloads(self):
+        """После invalidate типы загружаются заново"""
+        registry = PackageTypeRegistry()
+        repository = make_repository()
+        await registry.load(repository)
+
+        registry.invalidate()
+        assert registry.current is None
+
+        await registry.get(repository)
+        assert repository.get_all_types.await_count == 2
+
+    async def test_invalidation_message_resets_registry(self, monkeypatch):
+        """Сообщение об изменении типов сбрасывает реестр процесса"""
+        registry = package_types_module.package_types
+        monkeypatch.setattr(registry, "_types", PackageTypes({1: "Электроника"}))
+
+        invalidation.invalidate_local(PACKAGE_TYPES_KEY)
+        assert registry.current is None
+
+    async def test_notify_publishes_invalidation(self, monkeypatch):
+        """Изменение типов публикуется для остальных экземпляров приложения"""
+        registry = package_types_module.package_types
+        monkeypatch.setattr(registry, "_types", PackageTypes({1: "Электроника"}))
+        fake_cache = MagicMock(publish=AsyncMock(return_value=True))
+        monkeypatch.setattr(invalidation, "cache", fake_cache)
+
+        await notify_package_types_changed()
+
+        assert registry.current is None
+        fake_cache.publish.assert_awaited_once_with(
+            invalidation.INVALIDATION_CHANNEL, PACKAGE_TYPES_KEY
+        )
+
+
+class TestPackageTypesEndpoint:
+    """Тесты условных запросов к GET /packages/types"""
+
+    @pytest.fixture
+    def loaded_registry(self, monkeypatch):
+        registry = PackageTypeRegistry()
+        registry._types = PackageTypes({t.id: t.name for t in TYPES})
+        monkeypatch.setattr("src.services.packages.package_types", registry)
+        return registry
+
+    def test_etag_and_not_modified(self, client, loaded_registry):
+        """Совпадающий If-None-Match дает 304 без тела"""
+        response = client.get("/packages/types")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == loaded_registry.current.as_list()
+        assert "max-age" in response.headers["cache-control"]
+        etag = response.headers["etag"]
+
+        response = client.get(
+            "/packages/types", headers={"If-None-Match": f'"other", W/{etag}'}
+        )
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+        response = client.get("/packages/types", headers={"If-None-Match": '"other"'})
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_unknown_type_rejected(self, client, loaded_registry, sample_package_data):
+        """Неизвестный тип посылки отклоняется с 422 до обращения к БД"""
+        response = client.post("/packages/", json=dict(sample_package_data, type_id=42))
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert response.json()["detail"][0]["loc"] == ["body", "type_id"]
+
+        response = client.post(
+            "/packages/bulk",
+            json=[sample_package_data, dict(sample_package_data, type_id=42)],
+        )
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert response.json()["detail"][0]["loc"] == ["body", 1, "type_id"]
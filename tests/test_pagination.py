@@ -0,0 +1,26 @@
+import uuid
+from datetime import datetime
+
+import pytest
+
+from src.utils.pagination import InvalidCursorError, decode_cursor, encode_cursor
+
+
+class TestCursor:
+    """Тесты курсоров keyset-пагинации"""
+
+    def test_roundtrip(self):
+        """Курсор раскодируется в исходный ключ сортировки"""
+        created_at = datetime(2025, 9, 1, 12, 30, 15, 123456)
+        package_id = uuid.uuid4()
+
+        cursor = encode_cursor(created_at, package_id)
+
+        assert "=" not in cursor
+        assert decode_cursor(cursor) == (created_at, package_id)
+
+    @pytest.mark.parametrize("cursor", ["", "not-a-cursor", "bm90LWEtY3Vyc29y", "MjAyNS0wOS0wMXx4eXo"])
+    def test_invalid_cursor(self, cursor):
+        """Поврежденный курсор вызывает InvalidCursorError"""
+        with pytest.raises(InvalidCursorError):
+            decode_cursor(cursor)
@@ -0,0 +1,154 @@
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from src.services import sessions
+from src.services.packages import SESSION_FK_CONSTRAINT, PackageService
+from src.services.sessions import KnownSessions, SessionActivityTracker
+from src.utils.metrics import session_cache_requests
+
+
+class TestKnownSessions:
+    """Тесты кеша известных сессий"""
+
+    async def test_contains_after_add(self):
+        """Добавленная сессия считается известной"""
+        sessions = KnownSessions(maxsize=10, ttl=60)
+
+        assert not await sessions.contains("session-1")
+        await sessions.add("session-1")
+        assert await sessions.contains("session-1")
+
+        stats = sessions.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    async def test_discard(self):
+        """Забытая сессия снова проверяется в БД"""
+        sessions = KnownSessions(maxsize=10, ttl=60)
+        await sessions.add("session-1")
+        await sessions.discard("session-1")
+
+        assert not await sessions.contains("session-1")
+
+    async def test_discard_deletes_redis_key(self):
+        """Забытая сессия удаляется и из Redis"""
+        known = KnownSessions(maxsize=10, ttl=60, use_redis=True)
+        fake_cache = MagicMock(set=AsyncMock(), delete=AsyncMock(), exists=AsyncMock(return_value=False))
+        with patch.object(sessions, "cache", fake_cache):
+            await known.add("session-1")
+            await known.discard("session-1")
+
+            assert not await known.contains("session-1")
+        fake_cache.delete.assert_awaited_once_with(KnownSessions._redis_key("session-1"))
+
+    async def test_hit_rate_metrics(self):
+        """Обращения к кешу сессий учитываются в метриках"""
+        known = KnownSessions(maxsize=10, ttl=60)
+        hits = session_cache_requests.get(result="hit")
+        misses = session_cache_requests.get(result="miss")
+
+        await known.contains("session-1")
+        await known.add("session-1")
+        await known.contains("session-1")
+
+        assert session_cache_requests.get(result="hit") == hits + 1
+        assert session_cache_requests.get(result="miss") == misses + 1
+
+
+class TestSessionActivityTracker:
+    """Тесты отложенной записи активности сессий"""
+
+    @pytest.fixture
+    def repository(self):
+        repository = MagicMock()
+        repository.bulk_update_activity = AsyncMock(return_value=2)
+        db = MagicMock()
+        db.commit = AsyncMock()
+        db_context = MagicMock()
+        db_context.__aenter__ = AsyncMock(return_value=db)
+        db_context.__aexit__ = AsyncMock(return_value=False)
+        with patch.object(sessions, "async_session", MagicMock(return_value=db_context)), \
+                patch.object(sessions, "SessionRepository", MagicMock(return_value=repository)):
+            yield repository
+
+    async def test_flush_writes_touched_sessions_once(self, repository):
+        """Повторные обращения одной сессии дают одну запись"""
+        tracker = SessionActivityTracker()
+        first, second = str(uuid.uuid4()), str(uuid.uuid4())
+        for session_id in (first, second, first, "not-a-uuid"):
+            tracker.touch(session_id)
+
+        assert await tracker.flush() == 2
+        assert tracker.pending == 0
+
+        session_ids, _ = repository.bulk_update_activity.await_args.args
+        assert sorted(session_ids) == sorted([first, second])
+
+        assert await tracker.flush() == 0
+        assert repository.bulk_update_activity.await_count == 1
+
+    async def test_flush_error_keeps_sessions(self, repository):
+        """При ошибке записи сессии остаются в буфере"""
+        repository.bulk_update_activity.side_effect = ConnectionError("db is down")
+        tracker = SessionActivityTracker()
+        tracker.touch(str(uuid.uuid4()))
+
+        with pytest.raises(ConnectionError, match="db is down"):
+            await tracker.flush()
+        assert tracker.pending == 1
+
+
+class DriverError(Exception):
+    """Исключение драйвера БД с кодом SQLSTATE и именем ограничения"""
+
+    def __init__(self, sqlstate, constraint_name):
+        super().__init__(f"violates constraint {constraint_name}")
+        self.sqlstate = sqlstate
+        self.constraint_name = constraint_name
+
+
+def integrity_error(sqlstate, constraint_name):
+    orig = Exception("integrity error")
+    orig.__cause__ = DriverError(sqlstate, constraint_name)
+    return IntegrityError("INSERT INTO packages ...", {}, orig)
+
+
+class TestInsertWithSession:
+    """Тесты вставки посылок для сессии из кеша известных сессий"""
+
+    @pytest.fixture
+    def service(self, monkeypatch):
+        known = KnownSessions(maxsize=10, ttl=60)
+        monkeypatch.setattr("src.services.packages.known_sessions", known)
+        package_repository = MagicMock(session=MagicMock(rollback=AsyncMock()))
+        session_repository = MagicMock(build_upsert=MagicMock(return_value="upsert"))
+        return PackageService(package_repository, session_repository), known
+
+    async def test_missing_session_is_recreated(self, service):
+        """Если сессии из кеша нет в БД, вставка повторяется с созданием сессии"""
+        package_service, known = service
+        await known.add("session-1")
+        insert = AsyncMock(side_effect=[integrity_error("23503", SESSION_FK_CONSTRAINT), "package"])
+
+        assert await package_service._insert_with_session("session-1", insert) == "package"
+        assert [call.args for call in insert.await_args_list] == [(None,), ("upsert",)]
+        package_service.package_repository.session.rollback.assert_awaited_once()
+
+    @pytest.mark.parametrize("sqlstate, constraint", [
+        ("23503", "packages_type_id_fkey"),
+        ("23502", None),
+    ])
+    async def test_other_integrity_errors_are_raised(self, service, sqlstate, constraint):
+        """Прочие нарушения ограничений не считаются отсутствием сессии"""
+        package_service, known = service
+        await known.add("session-1")
+        insert = AsyncMock(side_effect=integrity_error(sqlstate, constraint))
+
+        with pytest.raises(IntegrityError):
+            await package_service._insert_with_session("session-1", insert)
+        assert insert.await_count == 1
+        assert await known.contains("session-1")
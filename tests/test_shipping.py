@@ -0,0 +1,208 @@
+import asyncio
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.models.db import ShippingStatus
+from src.services import packages, shipping
+
+
+class FakeCache:
+    """Минимальная замена RedisCache в памяти"""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+        self.locks = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, expire_seconds=3600):
+        self.data[key] = value
+        self.ttls[key] = expire_seconds
+        return True
+
+    async def ttl(self, key):
+        return self.ttls.get(key)
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+        return True
+
+    async def publish(self, channel, message):
+        return True
+
+    async def acquire_lock(self, key, token, expire_seconds):
+        if key in self.locks:
+            return False
+        self.locks[key] = token
+        return True
+
+    async def release_lock(self, key, token):
+        if self.locks.get(key) == token:
+            del self.locks[key]
+            return True
+        return False
+
+
+@pytest.fixture
+def fake_cache():
+    fake = FakeCache()
+    shipping._local_rates.clear()
+    with patch.object(shipping, "cache", fake):
+        yield fake
+    shipping._local_rates.clear()
+
+
+class TestShippingCost:
+    """Тесты расчета стоимости доставки"""
+
+    def test_calculate_shipping_cost(self):
+        """Тест формулы ((Вес × 0.5) + (Цена × 0.01)) × Курс"""
+        assert shipping.calculate_shipping_cost(1.0, 1000.0, 100.0) == 1050.0
+        assert shipping.calculate_shipping_cost(0.2, 0.0, 90.0) == 9.0
+        assert shipping.calculate_shipping_cost(0.2, 89990.0, 1.5) == 1350.0
+
+    def test_format_shipping_cost(self):
+        """Тест представления стоимости в ответе API"""
+        assert shipping.format_shipping_cost(Decimal("1349.85"), ShippingStatus.CALCULATED) == "1349.85"
+        assert shipping.format_shipping_cost(Decimal("9"), ShippingStatus.CALCULATED) == "9.00"
+        assert shipping.format_shipping_cost(None, ShippingStatus.PENDING) == "Не рассчитано"
+        assert shipping.format_shipping_cost(None, ShippingStatus.FAILED) == "Не рассчитано"
+
+
+class TestUsdRubRate:
+    """Тесты получения курса с кешированием"""
+
+    async def test_concurrent_misses_fetch_once(self, fake_cache):
+        """Параллельные промахи кеша приводят к одному запросу к ЦБ"""
+        async def slow_fetch():
+            await asyncio.sleep(0.05)
+            return 95.5
+
+        with patch.object(shipping, "fetch_usd_rub_rate", AsyncMock(side_effect=slow_fetch)) as mock_fetch:
+            rates = await asyncio.gather(*(shipping.get_usd_rub_rate() for _ in range(20)))
+
+        assert rates == [95.5] * 20
+        assert mock_fetch.await_count == 1
+        assert fake_cache.data[shipping.CACHE_KEY] == 95.5
+        assert fake_cache.data[shipping.STALE_CACHE_KEY] == 95.5
+        assert not fake_cache.locks
+
+    async def test_local_tier_skips_redis(self, fake_cache):
+        """Повторный запрос обслуживается из памяти процесса"""
+        fake_cache.data[shipping.CACHE_KEY] = 90.0
+        assert await shipping.get_usd_rub_rate() == 90.0
+
+        fake_cache.data[shipping.CACHE_KEY] = 91.0
+        assert await shipping.get_usd_rub_rate() == 90.0
+
+        await shipping.clear_usd_rub_cache()
+        fake_cache.data[shipping.CACHE_KEY] = 91.0
+        assert await shipping.get_usd_rub_rate() == 91.0
+
+    async def test_cached_rate_never_fetches(self, fake_cache):
+        """Курс только из кеша: при пустом кеше ЦБ не запрашивается"""
+        with patch.object(shipping, "fetch_usd_rub_rate", AsyncMock()) as mock_fetch:
+            assert await shipping.get_cached_usd_rub_rate() is None
+
+            fake_cache.data[shipping.CACHE_KEY] = "92.5"
+            assert await shipping.get_cached_usd_rub_rate() == 92.5
+
+        mock_fetch.assert_not_awaited()
+        assert shipping._local_rates.get(shipping.CACHE_KEY) == 92.5
+
+    async def test_stale_rate_when_lock_is_held(self, fake_cache):
+        """Пока курс обновляет другой процесс, отдается последний известный"""
+        fake_cache.data[shipping.STALE_CACHE_KEY] = 88.0
+        fake_cache.locks[shipping.REFRESH_LOCK_KEY] = "other-process"
+
+        with patch.object(shipping, "fetch_usd_rub_rate", AsyncMock(return_value=99.0)) as mock_fetch:
+            assert await shipping.get_usd_rub_rate() == 88.0
+
+        mock_fetch.assert_not_awaited()
+
+        # Повторные вызовы не обращаются к Redis до конца чужого обновления
+        with patch.object(fake_cache, "acquire_lock", AsyncMock()) as mock_lock:
+            assert await shipping.get_usd_rub_rate() == 88.0
+        mock_lock.assert_not_awaited()
+
+    async def test_stale_rate_when_cbr_is_down(self, fake_cache):
+        """При недоступности ЦБ отдается последний известный курс"""
+        fake_cache.data[shipping.STALE_CACHE_KEY] = 87.0
+
+        with patch.object(shipping, "fetch_usd_rub_rate", AsyncMock(side_effect=Exception("timeout"))):
+            assert await shipping.get_usd_rub_rate() == 87.0
+
+        assert not fake_cache.locks
+
+    async def test_refresh_skips_recently_updated_rate(self, fake_cache):
+        """Фоновое обновление пропускается, если курс только что обновлен"""
+        await fake_cache.set(shipping.CACHE_KEY, 90.0, shipping.CACHE_TTL)
+
+        with patch.object(shipping, "fetch_usd_rub_rate", AsyncMock(return_value=99.0)) as mock_fetch:
+            assert await shipping.refresh_usd_rub_rate(min_age=60) is None
+
+        mock_fetch.assert_not_awaited()
+
+    async def test_refresh_keeps_previous_rate_when_cbr_is_down(self, fake_cache):
+        """Фоновое обновление продлевает последний известный курс при ошибке ЦБ"""
+        fake_cache.data[shipping.STALE_CACHE_KEY] = 86.0
+
+        with patch.object(shipping, "fetch_usd_rub_rate", AsyncMock(side_effect=Exception("timeout"))):
+            assert await shipping.refresh_usd_rub_rate() == 86.0
+
+        assert fake_cache.data[shipping.CACHE_KEY] == 86.0
+        assert fake_cache.ttls[shipping.CACHE_KEY] == shipping.STALE_RETRY_SECONDS
+
+    async def test_refresher_schedules_by_remaining_ttl(self, fake_cache):
+        """Фоновое обновление планируется по оставшемуся TTL курса"""
+        assert await shipping._next_refresh_delay(2700, fallback=0) == 0
+
+        await fake_cache.set(shipping.CACHE_KEY, 90.0, 100)
+        assert await shipping._next_refresh_delay(2700, fallback=0) == 100 - shipping.REFRESH_MARGIN_SECONDS
+
+        await fake_cache.set(shipping.CACHE_KEY, 90.0, shipping.CACHE_TTL)
+        assert await shipping._next_refresh_delay(2700, fallback=0) == 2700
+
+    async def test_refresher_retries_stale_rate_before_expiry(self, fake_cache):
+        """После отдачи последнего известного курса обновление повторяется до его истечения"""
+        fake_cache.data[shipping.STALE_CACHE_KEY] = 86.0
+        delays = []
+
+        async def fake_sleep(delay):
+            delays.append(delay)
+            if len(delays) == 2:
+                raise asyncio.CancelledError
+
+        with patch.object(shipping, "fetch_usd_rub_rate", AsyncMock(side_effect=Exception("timeout"))), \
+                patch.object(shipping.asyncio, "sleep", fake_sleep):
+            with pytest.raises(asyncio.CancelledError):
+                await shipping.run_rate_refresher(interval=2700)
+
+        # Первое обновление сразу (курса нет), следующие — до истечения продленного курса
+        assert delays == [shipping.STALE_RETRY_SECONDS - shipping.REFRESH_MARGIN_SECONDS] * 2
+
+
+class TestBatchQueue:
+    """Тесты постановки посылок в очередь пакетного расчета"""
+
+    async def test_drain_scheduled_only_on_batch_boundary(self, monkeypatch):
+        """При длинной очереди задача выгрузки ставится раз в пачку, а не на каждую посылку"""
+        batch_size = 3
+        pending = iter(range(batch_size + 2, 3 * batch_size + 2))
+        monkeypatch.setattr(packages, "SHIPPING_BATCH_SIZE", batch_size)
+        monkeypatch.setattr(packages, "cache", MagicMock(push=AsyncMock(side_effect=lambda key, value: next(pending))))
+        drain = MagicMock()
+        drain.delay.return_value.id = "task-id"
+        monkeypatch.setattr(packages, "drain_pending_packages", drain)
+        service = packages.PackageService(MagicMock(), MagicMock())
+
+        for index in range(2 * batch_size):
+            response = await service._enqueue_for_batch(f"package-{index}")
+            assert response.status == "queued"
+
+        # Очередь выросла с 5 до 10 посылок — пересечены границы 6 и 9
+        assert drain.delay.call_count == 2